@@ -1,13 +1,16 @@
 ﻿import streamlit as st
+import logging
 import os
 import base64
-import importlib
 import re
 from datetime import datetime
-from utils import preparar_base
+import pandas as pd
+from utils import base_compartilhada
 from config import PALETA_CORES
 from filters import renderizar_painel_filtros
 import relatorio_pagina as relatorio_pagina
+from exportacao_plotly import obter_servico_exportacao
+from catalogo_colunas import estatisticas_catalogos
 
 # -----------------------------------------------------------------------------
 # Configuration
@@ -19,6 +22,11 @@ st.set_page_config(
     initial_sidebar_state='expanded'
 )
 
+# Copy-on-write: fatias e cópias rasas compartilham memória com a base e só
+# copiam um bloco quando alguém escreve nele. É o que permite entregar a mesma
+# base (utils.preparar_base) a todas as sessões sem cópias defensivas.
+pd.set_option('mode.copy_on_write', True)
+
 def _svg_data_uri(path):
     try:
         with open(path, "rb") as f:
@@ -498,8 +506,9 @@ if _header_logo_uri:
 # Global Elements
 # -----------------------------------------------------------------------------
 
-# Dados para filtros globais (exceto Início)
-df = preparar_base()
+# Dados para filtros globais (exceto Início). O painel só lê a base e usa o
+# próprio objeto compartilhado, que é o que o índice de filtros reconhece.
+df = base_compartilhada()
 
 
 # -----------------------------------------------------------------------------
@@ -522,6 +531,9 @@ pages = {
 }
 
 pg = st.navigation(pages)
+
+# Sobe (uma vez por processo) o exportador de PNG em segundo plano para o relatório.
+obter_servico_exportacao()
 is_home = pg.title == home_page.title
 
 # Layout centrado somente para a página inicial.
@@ -546,31 +558,39 @@ if not is_home:
 
 pg.run()
 
+# Custo acumulado das buscas de coluna (catálogo), visível com o log em nível DEBUG.
+logging.getLogger(__name__).debug("Buscas de coluna: %s", estatisticas_catalogos())
+
 if not is_home:
     st.sidebar.divider()
     st.sidebar.markdown("### Exportar")
     with st.sidebar:
-        relatorio_pagina = importlib.reload(relatorio_pagina)
-        payload_relatorio = relatorio_pagina.gerar_payload_relatorio(st.session_state.get("filtros_globais"))
-        montar_pdf_fn = getattr(relatorio_pagina, "montar_pdf_relatorio", None)
-        pdf_relatorio = montar_pdf_fn(payload_relatorio, aba_preferida=None) if callable(montar_pdf_fn) else b""
-        stamp_relatorio = datetime.now().strftime("%Y%m%d-%H%M")
-        nome_arquivo_relatorio = (
-            f"dashboard-diagnostico-economico-cultura-viva-"
-            f"{_slug_nome_arquivo(pg.title)}-{stamp_relatorio}.pdf"
-        )
-
-        st.download_button(
-            "⬇️ Baixar Relatório da Página (PDF)",
-            data=pdf_relatorio,
-            file_name=nome_arquivo_relatorio,
-            mime="application/pdf",
+        # O PDF só é montado quando solicitado: a maioria das execuções não
+        # precisa do relatório e a montagem (reportlab + imagens) é cara.
+        pdf_relatorio = b""
+        solicitou_relatorio = st.button(
+            "📄 Preparar Relatório da Página (PDF)",
+            key=relatorio_pagina.CHAVE_BOTAO_RELATORIO,
             use_container_width=True,
-            disabled=not bool(pdf_relatorio),
         )
-        if not pdf_relatorio:
-            st.caption("Não foi possível gerar o PDF nesta execução. Recarregue a página e tente novamente.")
+        if solicitou_relatorio:
+            with st.spinner("Montando relatório...", show_time=True):
+                pdf_relatorio = relatorio_pagina.gerar_pdf_relatorio(st.session_state.get("filtros_globais"))
+            if pdf_relatorio:
+                stamp_relatorio = datetime.now().strftime("%Y%m%d-%H%M")
+                nome_arquivo_relatorio = (
+                    f"dashboard-diagnostico-economico-cultura-viva-"
+                    f"{_slug_nome_arquivo(pg.title)}-{stamp_relatorio}.pdf"
+                )
+
+                st.download_button(
+                    "⬇️ Baixar Relatório da Página (PDF)",
+                    data=pdf_relatorio,
+                    file_name=nome_arquivo_relatorio,
+                    mime="application/pdf",
+                    on_click="ignore",
+                    use_container_width=True,
+                )
 
     st.sidebar.caption("O relatório em PDF usa a página atual, filtros ativos e todas as abas disponíveis.")
     st.sidebar.divider()
-
@@ -0,0 +1,181 @@
+import bisect
+import threading
+import time
+import unicodedata
+import weakref
+
+from utils import CacheLRU, normalizar_texto
+
+
+def normalizar_coluna(texto):
+    """Normalização usada pelas buscas de coluna das páginas (sem acento, minúsculas)."""
+    texto = "" if texto is None else str(texto)
+    texto = texto.replace("ﬁ", "fi").replace("ﬂ", "fl")
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = texto.encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.lower().split())
+
+
+class CatalogoColunas:
+    """
+    Nomes de coluna normalizados uma única vez, com índices para busca exata,
+    por prefixo, por trecho e por palavras. Mantém a mesma regra de precedência
+    das buscas lineares: em caso de empate vence a primeira coluna na ordem do
+    DataFrame. Resultados de cada consulta são memorizados.
+    """
+
+    def __init__(self, colunas, normalizar):
+        self.colunas = list(colunas)
+        self.normalizar = normalizar
+        self.normalizadas = [normalizar(c) for c in self.colunas]
+
+        self._exato = {}
+        for pos, nome in enumerate(self.normalizadas):
+            self._exato.setdefault(nome, pos)
+        self._ordenadas = sorted((nome, pos) for pos, nome in enumerate(self.normalizadas))
+        self._chaves_ordenadas = [nome for nome, _ in self._ordenadas]
+        self._palavras = {}
+        for pos, nome in enumerate(self.normalizadas):
+            for palavra in set(nome.split()):
+                self._palavras.setdefault(palavra, set()).add(pos)
+
+        self._memo = {}
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.acertos_memo = 0
+        self.tempo_total = 0.0
+
+    def _consultar(self, chave, busca):
+        inicio = time.perf_counter()
+        with self._lock:
+            self.consultas += 1
+            if chave in self._memo:
+                self.acertos_memo += 1
+                resultado = self._memo[chave]
+                self.tempo_total += time.perf_counter() - inicio
+                return resultado
+        resultado = busca()
+        with self._lock:
+            self._memo[chave] = resultado
+            self.tempo_total += time.perf_counter() - inicio
+        return resultado
+
+    def _candidatos(self, alvo_n):
+        # Palavras internas do alvo (as das pontas podem estar cortadas) restringem a busca por trecho.
+        palavras = sorted(set(alvo_n.split()[1:-1]), key=len, reverse=True)[:3]
+        candidatos = None
+        for palavra in palavras:
+            posicoes = self._palavras.get(palavra, set())
+            candidatos = posicoes if candidatos is None else candidatos & posicoes
+            if not candidatos:
+                return []
+        return range(len(self.normalizadas)) if candidatos is None else sorted(candidatos)
+
+    def _posicoes_prefixo(self, prefixo_n):
+        inicio = bisect.bisect_left(self._chaves_ordenadas, prefixo_n)
+        posicoes = []
+        for nome, pos in self._ordenadas[inicio:]:
+            if not nome.startswith(prefixo_n):
+                break
+            posicoes.append(pos)
+        return sorted(posicoes)
+
+    def encontrar(self, alvo):
+        """Igual a `encontrar_coluna`: nome exato, senão a primeira coluna que contém o alvo."""
+        alvo_n = self.normalizar(alvo)
+
+        def busca():
+            pos = self._exato.get(alvo_n)
+            if pos is not None:
+                return self.colunas[pos]
+            for pos in self._candidatos(alvo_n):
+                if alvo_n in self.normalizadas[pos]:
+                    return self.colunas[pos]
+            return None
+
+        return self._consultar(("encontrar", alvo_n), busca)
+
+    def por_prefixo(self, prefixos_normalizados):
+        """Primeira coluna cujo nome normalizado começa com algum dos prefixos."""
+        prefixos = tuple(prefixos_normalizados)
+
+        def busca():
+            posicoes = [p for prefixo in prefixos for p in self._posicoes_prefixo(prefixo)[:1]]
+            return self.colunas[min(posicoes)] if posicoes else None
+
+        return self._consultar(("prefixo", prefixos), busca)
+
+    def todas_por_prefixo(self, prefixo_normalizado):
+        """Todas as colunas cujo nome normalizado começa com o prefixo, na ordem do DataFrame."""
+        return self._consultar(
+            ("todas_prefixo", prefixo_normalizado),
+            lambda: [self.colunas[p] for p in self._posicoes_prefixo(prefixo_normalizado)],
+        )
+
+    def por_trechos(self, *trechos):
+        """Primeira coluna que contém todos os trechos informados."""
+        trechos_n = tuple(self.normalizar(t) for t in trechos)
+
+        def busca():
+            for pos, nome in enumerate(self.normalizadas):
+                if all(t in nome for t in trechos_n):
+                    return self.colunas[pos]
+            return None
+
+        return self._consultar(("trechos", trechos_n), busca)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "colunas": len(self.colunas),
+                "consultas": self.consultas,
+                "acertos_memo": self.acertos_memo,
+                "tempo_total_ms": round(self.tempo_total * 1000, 3),
+                "tempo_medio_us": round(self.tempo_total / self.consultas * 1e6, 2) if self.consultas else 0.0,
+            }
+
+
+_catalogos = CacheLRU(max_itens=16)
+# Atalho por objeto: `df.columns` devolve sempre o mesmo Index enquanto o
+# DataFrame (e suas cópias rasas) existir, então a consulta não refaz a tupla
+# de nomes. A entrada sai junto com o Index, pelo callback do weakref.
+_por_objeto = {}
+_lock_por_objeto = threading.Lock()
+
+
+def _esquecer(chave):
+    def callback(_ref):
+        with _lock_por_objeto:
+            _por_objeto.pop(chave, None)
+    return callback
+
+
+def obter_catalogo(colunas, normalizar=normalizar_coluna):
+    """Catálogo das colunas informadas, construído uma vez por conjunto de colunas."""
+    chave_objeto = (id(colunas), normalizar.__name__)
+    with _lock_por_objeto:
+        entrada = _por_objeto.get(chave_objeto)
+    if entrada is not None and entrada[0]() is colunas:
+        return entrada[1]
+
+    chave = (normalizar.__name__, tuple(str(c) for c in colunas))
+    catalogo = _catalogos.obter(chave)
+    if catalogo is None:
+        catalogo = CatalogoColunas(chave[1], normalizar)
+        _catalogos.guardar(chave, catalogo)
+    try:
+        ref = weakref.ref(colunas, _esquecer(chave_objeto))
+    except TypeError:
+        # Listas e tuplas não aceitam weakref: ficam só no cache por nomes.
+        return catalogo
+    with _lock_por_objeto:
+        _por_objeto[chave_objeto] = (ref, catalogo)
+    return catalogo
+
+
+def estatisticas_catalogos():
+    """Volume e tempo das buscas de coluna por catálogo, para confirmar que a varredura saiu do caminho."""
+    return {
+        "cache": _catalogos.estatisticas(),
+        "catalogos": [catalogo.estatisticas() for catalogo in _catalogos.valores()],
+    }
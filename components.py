@@ -1,4 +1,7 @@
-﻿import os
+﻿import functools
+import io
+import os
+import threading
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -8,7 +11,12 @@ import matplotlib
 matplotlib.use('Agg')          # back-end sem janela
 import matplotlib.pyplot as plt
 import geopandas as gpd
-from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PatchCollection
+from matplotlib.colors import LinearSegmentedColormap, Normalize
+from matplotlib.figure import Figure
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
 from matplotlib.ticker import FuncFormatter
 # Folium Imports
 import folium
@@ -18,7 +26,9 @@ from mpl_toolkits.axes_grid1 import make_axes_locatable
 
 from config import (CORES_GRAFICOS, PALETA_CORES, CORES_DINAMICAS,
                     FONTE_FAMILIA, FONTE_TAMANHOS, REGIOES_POR_UF)
+import geometrias
 import relatorio_pagina
+from utils import CacheLRU
 
 # ---------------------------------------------------------------------------
 # Layout-base global que é aplicado em TODOS os gráficos
@@ -44,6 +54,52 @@ def _aplicar_titulo_mapa(ax, titulo):
     )
 
 
+def fragmento(secao):
+    """
+    Decorador para blocos interativos das páginas: a função roda como
+    `st.fragment`, então mexer num widget dela reexecuta só o bloco. Os
+    gráficos que ela registra para o relatório ficam marcados com `secao`
+    (um nome único na página) e são trocados, não duplicados, na reexecução.
+    """
+    def decorador(func):
+        @st.fragment
+        @functools.wraps(func)
+        def executar(*args, **kwargs):
+            with relatorio_pagina.secao_relatorio(secao):
+                return func(*args, **kwargs)
+        return executar
+    return decorador
+
+
+def renderizar_abas(chave, abas):
+    """
+    Alternativa a `st.tabs` que só executa a aba escolhida. `abas` é uma lista
+    de `(rótulo, função)`. Quando o PDF foi solicitado, as abas ocultas entram
+    com os gráficos da última vez em que foram abertas com os filtros atuais;
+    só as que nunca rodaram com esses filtros são executadas, sem exibição.
+    """
+    rotulos = [rotulo for rotulo, _ in abas]
+    escolhida = st.segmented_control(
+        'Seção',
+        rotulos,
+        selection_mode='single',
+        default=rotulos[0],
+        key=chave,
+        label_visibility='collapsed',
+    ) or rotulos[0]
+    gerar_todas = relatorio_pagina.relatorio_solicitado()
+
+    for rotulo, funcao in abas:
+        origem = (chave, rotulo)
+        if rotulo == escolhida:
+            relatorio_pagina.executar_aba(origem, funcao)
+        elif gerar_todas and not relatorio_pagina.reaproveitar_aba(origem):
+            espaco = st.empty()
+            with espaco.container(), relatorio_pagina.suprimir_exibicao():
+                relatorio_pagina.executar_aba(origem, funcao)
+            espaco.empty()
+
+
 def mostrar_grafico(fig, subtitulo, config_extra=None, nota_rodape=None):
     if fig is None:
         return
@@ -90,7 +146,8 @@ def mostrar_grafico(fig, subtitulo, config_extra=None, nota_rodape=None):
     if config_extra:
         config.update(config_extra)
 
-    st.plotly_chart(fig, use_container_width=True, config=config)
+    if not relatorio_pagina.exibicao_suprimida():
+        st.plotly_chart(fig, use_container_width=True, config=config)
     relatorio_pagina.registrar_grafico_plotly(fig, subtitulo)
 
     if nota_rodape:
@@ -218,11 +275,77 @@ def _carregar_gdf_estados():
     return gdf
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def _carregar_gdf_municipios():
-    """GeoDataFrame via geobr (cacheado)."""
-    import geobr
-    return geobr.read_municipality(year=2022)
+    """Malha municipal simplificada (GeoParquet local), lida uma vez por processo."""
+    return geometrias.carregar_municipios()
+
+
+@st.cache_resource(show_spinner=False)
+def _niveis_estados():
+    return geometrias.em_niveis(_carregar_gdf_estados())
+
+
+@st.cache_resource(show_spinner=False)
+def _niveis_municipios():
+    return geometrias.em_niveis(_carregar_gdf_municipios())
+
+
+def _estados_no_nivel(largura_graus=None):
+    """Estados no nível de detalhe da extensão enquadrada (padrão: Brasil inteiro)."""
+    niveis = _niveis_estados()
+    if largura_graus is None:
+        minx, _, maxx, _ = niveis[min(niveis)].total_bounds
+        largura_graus = maxx - minx
+    return niveis[geometrias.nivel_para_extensao(largura_graus)]
+
+
+def _mesclar_contagem_municipios(gdf_mun, df_contagem_cidades):
+    if 'uf' in df_contagem_cidades.columns:
+        return gdf_mun.merge(
+            df_contagem_cidades,
+            left_on=['name_muni', 'abbrev_state'], right_on=['cidade', 'uf'],
+            how='left'
+        )
+    return gdf_mun.merge(
+        df_contagem_cidades,
+        left_on='name_muni', right_on='cidade',
+        how='left'
+    )
+
+
+# PNGs dos mapas, compartilhados entre sessões. A chave deve identificar a
+# visão e a tabela de contagens (ver `paginas/1_Identificacao.py`).
+DPI_MAPAS = 170
+
+
+@st.cache_resource(show_spinner=False)
+def _cache_mapas():
+    return CacheLRU(max_itens=64, max_bytes=96 * 1024 * 1024)
+
+
+def png_em_cache(chave, gerar_png):
+    """PNG do mapa identificado por `chave`; `gerar_png()` só roda quando ele não está no cache."""
+    cache = _cache_mapas()
+    png = cache.obter(chave)
+    if png is None:
+        png = gerar_png()
+        cache.guardar(chave, png)
+    return png
+
+
+def mapa_em_png(chave, gerar_figura):
+    """Como `png_em_cache`, para mapas desenhados numa figura matplotlib nova."""
+    def gerar_png():
+        fig = gerar_figura()
+        buf = io.BytesIO()
+        try:
+            fig.savefig(buf, format='png', dpi=DPI_MAPAS, bbox_inches='tight')
+        finally:
+            plt.close(fig)
+        return buf.getvalue()
+
+    return png_em_cache(chave, gerar_png)
 
 
 # ---------------------------------------------------------------------------
@@ -239,6 +362,52 @@ _AJUSTES_SETAS_ESTADOS = {
 }
 
 
+@st.cache_resource(show_spinner=False)
+def _geometrias_derivadas():
+    """
+    Tudo o que depende só da malha, calculado uma vez: regiões dissolvidas,
+    centroides dos estados (com a posição do rótulo e da seta dos estados
+    pequenos) e o ponto central de cada região. Âncoras e dissolve usam a
+    malha cheia; só o contorno final das regiões é simplificado.
+    """
+    gdf = _carregar_gdf_estados()
+
+    centroides = gdf.to_crs(epsg=5880).geometry.centroid.to_crs(gdf.crs)
+    rotulos_estados = pd.DataFrame({
+        'SIGLA': gdf['SIGLA'].values,
+        'x': centroides.x.values,
+        'y': centroides.y.values,
+    })
+    ajustes = rotulos_estados['SIGLA'].map(lambda sigla: _AJUSTES_SETAS_ESTADOS.get(sigla, (0.0, 0.0)))
+    rotulos_estados['seta'] = rotulos_estados['SIGLA'].isin(list(_AJUSTES_SETAS_ESTADOS))
+    rotulos_estados['texto_x'] = rotulos_estados['x'] + [dx for dx, _ in ajustes]
+    rotulos_estados['texto_y'] = rotulos_estados['y'] + [dy for _, dy in ajustes]
+
+    # Na malha cheia as fronteiras entre estados coincidem: o dissolve fecha
+    # sem buffer. A simplificação vem depois, sobre o contorno das regiões.
+    gdf_temp = gdf[['SIGLA', 'geometry']].copy()
+    gdf_temp['regiao_nome'] = gdf_temp['SIGLA'].map(lambda sigla: REGIOES_POR_UF.get(sigla, ''))
+    regioes_cheias = gdf_temp[['regiao_nome', 'geometry']].dissolve(by='regiao_nome').reset_index()
+    minx, _, maxx, _ = regioes_cheias.total_bounds
+    regioes = regioes_cheias.copy()
+    regioes['geometry'] = geometrias.simplificar_cobertura(
+        regioes_cheias.geometry, geometrias.nivel_para_extensao(maxx - minx)
+    )
+    regioes = regioes.to_crs(epsg=4326)
+
+    pontos_centrais = regioes_cheias.geometry.representative_point().to_crs(epsg=4326)
+    rotulos_regioes = pd.DataFrame({
+        'regiao_nome': regioes['regiao_nome'].values,
+        'x': pontos_centrais.x.values,
+        'y': pontos_centrais.y.values,
+    })
+    return {
+        'regioes': regioes,
+        'rotulos_estados': rotulos_estados,
+        'rotulos_regioes': rotulos_regioes,
+    }
+
+
 def mapa_estados_matplotlib(df_contagem):
     """
     Mapa coroplético de estados – idêntico ao arquivo de referência.
@@ -247,7 +416,7 @@ def mapa_estados_matplotlib(df_contagem):
     ----------
     df_contagem : DataFrame com colunas ['uf', 'contagem'].
     """
-    gdf = _carregar_gdf_estados().copy()
+    gdf = _estados_no_nivel()
 
     total = df_contagem['contagem'].sum()
     df_contagem = df_contagem.copy()
@@ -275,23 +444,23 @@ def mapa_estados_matplotlib(df_contagem):
     ax.axis('off')
 
     # ---- rótulos ----
-    mapa_proj = mapa.to_crs(epsg=5880)
-    mapa['centroide'] = mapa_proj.geometry.centroid.to_crs(mapa.crs)
+    rotulos = _geometrias_derivadas()['rotulos_estados'].merge(
+        df_contagem[['uf', 'percentual']], left_on='SIGLA', right_on='uf'
+    )
 
-    for _, row in mapa.iterrows():
-        if pd.isna(row.get('percentual')):
+    for row in rotulos.itertuples(index=False):
+        if pd.isna(row.percentual):
             continue
-        sigla = row['SIGLA']
-        pct = row['percentual']
+        sigla = row.SIGLA
+        pct = row.percentual
         valor_fmt = f"{pct*100:.1f}%".replace('.', ',')
-        x, y = row['centroide'].x, row['centroide'].y
+        x, y = row.x, row.y
         cor_texto = 'white' if pct > 0.09 else 'black'
 
-        if sigla in _AJUSTES_SETAS_ESTADOS:
-            off_x, off_y = _AJUSTES_SETAS_ESTADOS[sigla]
+        if row.seta:
             ax.annotate(
                 text=f"{sigla}\n{valor_fmt}",
-                xy=(x, y), xytext=(x + off_x, y + off_y),
+                xy=(x, y), xytext=(row.texto_x, row.texto_y),
                 arrowprops=dict(arrowstyle='-', color='black', linewidth=0.8),
                 ha='center', va='center',
                 fontsize=11, fontweight='bold', color='black'
@@ -317,25 +486,15 @@ def mapa_regioes_matplotlib(df_contagem_regiao):
     ----------
     df_contagem_regiao : DataFrame com colunas ['regiao', 'contagem'].
     """
-    gdf = _carregar_gdf_estados().copy()
+    derivadas = _geometrias_derivadas()
 
     total = df_contagem_regiao['contagem'].sum()
     df_contagem_regiao = df_contagem_regiao.copy()
     df_contagem_regiao['percentual'] = df_contagem_regiao['contagem'] / total
 
-    # mapear sigla → nome da região
-    gdf['regiao_nome'] = gdf['SIGLA'].map(
-        {k: REGIOES_POR_UF.get(k, '') for k in gdf['SIGLA']}
-    )
-
-    # correção de topologia:  projetar → buffer → dissolve → voltar
-    gdf_temp = gdf.to_crs(epsg=5880)
-    gdf_temp['geometry'] = gdf_temp.geometry.buffer(500)
-    gdf_regioes = gdf_temp.dissolve(by='regiao_nome').reset_index()
-    gdf_regioes = gdf_regioes.to_crs(epsg=4326)
-
-    mapa = gdf_regioes.merge(df_contagem_regiao,
-                              left_on='regiao_nome', right_on='regiao')
+    # Regiões já dissolvidas: aqui só se colore.
+    mapa = derivadas['regioes'].merge(df_contagem_regiao,
+                                      left_on='regiao_nome', right_on='regiao')
 
     fig, ax = plt.subplots(1, 1, figsize=(12, 12))
     ax.set_aspect('equal')
@@ -355,16 +514,17 @@ def mapa_regioes_matplotlib(df_contagem_regiao):
     ax.axis('off')
 
     # ---- rótulos ----
-    mapa_proj = mapa.to_crs(epsg=5880)
-    mapa['ponto_central'] = mapa_proj.geometry.representative_point().to_crs(mapa.crs)
+    rotulos = derivadas['rotulos_regioes'].merge(
+        mapa[['regiao_nome', 'percentual']], on='regiao_nome'
+    )
 
-    for _, row in mapa.iterrows():
-        nome = row['regiao_nome'].upper()
-        valor = f"{row['percentual']*100:.1f}%".replace('.', ',')
-        cor = 'white' if row['percentual'] > 0.18 else 'black'
+    for row in rotulos.itertuples(index=False):
+        nome = row.regiao_nome.upper()
+        valor = f"{row.percentual*100:.1f}%".replace('.', ',')
+        cor = 'white' if row.percentual > 0.18 else 'black'
 
         ax.text(
-            row['ponto_central'].x, row['ponto_central'].y,
+            row.x, row.y,
             f"{nome}\n{valor}",
             ha='center', va='center',
             fontsize=14, fontweight='bold', color=cor
@@ -378,80 +538,156 @@ def mapa_regioes_matplotlib(df_contagem_regiao):
 # ---------------------------------------------------------------------------
 # MAPA DE MUNICÍPIOS  (fiel ao referência – 3 camadas)
 # ---------------------------------------------------------------------------
-def mapa_municipios_matplotlib(df_contagem_cidades):
+def _enquadrar_municipios(df_contagem_cidades):
     """
-    Mapa coroplético por município – 3 camadas (fundo estadual,
-    municípios, bordas estaduais).
-
-    Parâmetros
-    ----------
-    df_contagem_cidades : DataFrame com colunas ['cidade', 'contagem'].
+    Percentuais por município, nível de detalhe e enquadramento do mapa
+    municipal. O enquadramento (auto-zoom na área com municípios filtrados,
+    com padding suave) sai da malha mais leve; com a largura dele escolhe-se
+    o nível das geometrias efetivamente desenhadas.
+    Retorna `(df_contagem, nivel, limites)`; `limites` é
+    `((x0, x1), (y0, y1))` ou None (Brasil inteiro).
     """
-    gdf_estados = _carregar_gdf_estados().copy()
-    gdf_mun = _carregar_gdf_municipios().copy()
-
     total = df_contagem_cidades['contagem'].sum()
     df_contagem_cidades = df_contagem_cidades.copy()
     df_contagem_cidades['percentual'] = df_contagem_cidades['contagem'] / total
-
     if 'uf' in df_contagem_cidades.columns:
         df_contagem_cidades['uf'] = df_contagem_cidades['uf'].astype(str).str.upper().str.strip()
-        mapa_mun = gdf_mun.merge(
-            df_contagem_cidades,
-            left_on=['name_muni', 'abbrev_state'], right_on=['cidade', 'uf'],
-            how='left'
-        )
-    else:
-        mapa_mun = gdf_mun.merge(
-            df_contagem_cidades,
-            left_on='name_muni', right_on='cidade',
-            how='left'
-        )
-    mapa_mun_com_dado = mapa_mun[mapa_mun['percentual'].notna() & (mapa_mun['percentual'] > 0)].copy()
 
-    fig, ax = plt.subplots(1, 1, figsize=(12, 12))
-    ax.set_aspect('equal')
+    niveis_mun = _niveis_municipios()
+    mapa_mun = _mesclar_contagem_municipios(niveis_mun[max(niveis_mun)], df_contagem_cidades)
+    mapa_mun_com_dado = mapa_mun[mapa_mun['percentual'].notna() & (mapa_mun['percentual'] > 0)]
+    minx, _, maxx, _ = (mapa_mun_com_dado if not mapa_mun_com_dado.empty else mapa_mun).total_bounds
+    largura = (maxx - minx) * 1.2
 
-    # Barra de legenda curta e discreta (altura ~1/3 do mapa), padrão Estado
-    cax = ax.inset_axes([1.01, 0.33, 0.02, 0.34])
+    limites = None
+    if not mapa_mun_com_dado.empty:
+        minx, miny, maxx, maxy = mapa_mun_com_dado.total_bounds
+        pad_x = max((maxx - minx) * 0.10, 0.25)
+        pad_y = max((maxy - miny) * 0.10, 0.25)
+        limites = ((minx - pad_x, maxx + pad_x), (miny - pad_y, maxy + pad_y))
+    return df_contagem_cidades, geometrias.nivel_para_extensao(largura), limites
+
+
+def _caminhos_poligonos(geometrias_linhas):
+    """
+    Um `Path` por polígono (multipolígonos são desmembrados, furos viram
+    anéis internos) e, para cada caminho, a linha de origem.
+    """
+    caminhos, linhas = [], []
+    for linha, geometria in enumerate(geometrias_linhas):
+        if geometria is None or geometria.is_empty:
+            continue
+        for poligono in getattr(geometria, 'geoms', [geometria]):
+            if poligono.is_empty or not hasattr(poligono, 'exterior'):
+                continue
+            aneis = [np.asarray(poligono.exterior.coords)[:, :2]]
+            aneis += [np.asarray(anel.coords)[:, :2] for anel in poligono.interiors]
+            codigos = []
+            for anel in aneis:
+                codigo = np.full(len(anel), Path.LINETO, dtype=Path.code_type)
+                codigo[0] = Path.MOVETO
+                codigo[-1] = Path.CLOSEPOLY
+                codigos.append(codigo)
+            caminhos.append(Path(np.concatenate(aneis), np.concatenate(codigos)))
+            linhas.append(linha)
+    return caminhos, np.asarray(linhas, dtype=np.int64)
+
+
+class RenderizadorMunicipios:
+    """
+    Mapa municipal montado uma vez por nível de detalhe: fundo estadual,
+    polígonos dos municípios (uma única coleção) e bordas estaduais ficam na
+    mesma figura. Para uma nova contagem só mudam as cores das faces, os
+    limites da barra de cores e o enquadramento; depois a figura é
+    rasterizada. A figura é compartilhada entre sessões, daí o lock.
+    """
 
-    formatter = FuncFormatter(lambda x, _: f'{x*100:.2f}%')
+    COR_SEM_DADO = (1.0, 1.0, 1.0, 1.0)
 
-    # CAMADA 1 – estados como fundo cinza
-    gdf_estados.plot(ax=ax, color='#F0F0F0', edgecolor='gray',
-                     linewidth=0.5, zorder=1)
+    def __init__(self, gdf_municipios, gdf_estados):
+        self._lock = threading.Lock()
+        self.municipios = pd.DataFrame(gdf_municipios.drop(columns='geometry')).reset_index(drop=True)
 
-    # CAMADA 2 – municípios (dados)
-    mapa_mun.plot(
-        column='percentual', cmap=_CMAP_MAPA, ax=ax, cax=cax,
-        legend=True, zorder=2,
-        linewidth=0.30, edgecolor='gray',
-        legend_kwds={'orientation': 'vertical', 'format': formatter},
-        missing_kwds={'color': 'white', 'edgecolor': 'gray',
-                      'label': 'Sem dados'}
-    )
+        self.fig = Figure(figsize=(12, 12))
+        ax = self.fig.add_subplot(1, 1, 1)
+        ax.set_aspect('equal')
+        self.ax = ax
 
-    cax.tick_params(labelsize=10, length=2)
+        # CAMADA 1 – estados como fundo cinza
+        gdf_estados.plot(ax=ax, color='#F0F0F0', edgecolor='gray',
+                         linewidth=0.5, zorder=1)
 
-    # CAMADA 3 – bordas estaduais por cima
-    gdf_estados.plot(ax=ax, facecolor='none', edgecolor='gray',
-                     linewidth=1.0, zorder=3)
+        # CAMADA 2 – municípios, cores definidas em `renderizar`
+        caminhos, self.linha_do_caminho = _caminhos_poligonos(gdf_municipios.geometry.values)
+        self.colecao = PatchCollection(
+            [PathPatch(caminho) for caminho in caminhos], match_original=False,
+            facecolor='white', edgecolor='gray', linewidth=0.30, zorder=2,
+        )
+        ax.add_collection(self.colecao, autolim=True)
+
+        # CAMADA 3 – bordas estaduais por cima
+        gdf_estados.plot(ax=ax, facecolor='none', edgecolor='gray',
+                         linewidth=1.0, zorder=3)
+
+        ax.autoscale_view()
+        self.extensao_total = (ax.get_xlim(), ax.get_ylim())
+
+        # Barra de legenda curta e discreta (altura ~1/3 do mapa), padrão Estado
+        cax = ax.inset_axes([1.01, 0.33, 0.02, 0.34])
+        self.escala = ScalarMappable(norm=Normalize(0, 1), cmap=_CMAP_MAPA)
+        self.fig.colorbar(self.escala, cax=cax, orientation='vertical',
+                          format=FuncFormatter(lambda x, _: f'{x*100:.2f}%'))
+        cax.tick_params(labelsize=10, length=2)
+
+        _aplicar_titulo_mapa(ax, 'Pontos de Cultura por Município')
+        ax.axis('off')
+        self.fig.tight_layout()
+
+    def _valores(self, df_contagem_cidades):
+        """Percentual de cada município da malha (NaN onde não há dado)."""
+        chaves = ['cidade', 'uf'] if 'uf' in df_contagem_cidades.columns else ['cidade']
+        contagem = df_contagem_cidades.drop_duplicates(subset=chaves)
+        mesclado = _mesclar_contagem_municipios(self.municipios, contagem)
+        return mesclado['percentual'].to_numpy(dtype=float)
+
+    def renderizar(self, df_contagem_cidades, limites=None):
+        """PNG do mapa para `df_contagem_cidades` (com a coluna 'percentual')."""
+        valores = self._valores(df_contagem_cidades)
+        com_dado = ~np.isnan(valores)
+        cores = np.tile(self.COR_SEM_DADO, (len(valores), 1))
+        if com_dado.any():
+            vmin, vmax = np.nanmin(valores), np.nanmax(valores)
+        else:
+            vmin, vmax = 0.0, 1.0
+        xlim, ylim = limites or self.extensao_total
 
-    # Auto-zoom: enquadra apenas a área com municípios filtrados (com padding suave).
-    if not mapa_mun_com_dado.empty:
-        minx, miny, maxx, maxy = mapa_mun_com_dado.total_bounds
-        dx = maxx - minx
-        dy = maxy - miny
-        pad_x = max(dx * 0.10, 0.25)
-        pad_y = max(dy * 0.10, 0.25)
-        ax.set_xlim(minx - pad_x, maxx + pad_x)
-        ax.set_ylim(miny - pad_y, maxy + pad_y)
-
-    _aplicar_titulo_mapa(ax, 'Pontos de Cultura por Município')
-    ax.axis('off')
+        with self._lock:
+            self.escala.set_clim(vmin, vmax)
+            cores[com_dado] = self.escala.to_rgba(valores[com_dado])
+            self.colecao.set_facecolor(cores[self.linha_do_caminho])
+            self.ax.set_xlim(*xlim)
+            self.ax.set_ylim(*ylim)
+            buf = io.BytesIO()
+            self.fig.savefig(buf, format='png', dpi=DPI_MAPAS, bbox_inches='tight')
+        return buf.getvalue()
 
-    plt.tight_layout()
-    return fig
+
+@st.cache_resource(show_spinner=False)
+def _renderizador_municipios(nivel):
+    return RenderizadorMunicipios(_niveis_municipios()[nivel], _niveis_estados()[nivel])
+
+
+def mapa_municipios_png(df_contagem_cidades):
+    """
+    PNG do mapa coroplético por município – 3 camadas (fundo estadual,
+    municípios, bordas estaduais), reaproveitando as camadas já montadas.
+
+    Parâmetros
+    ----------
+    df_contagem_cidades : DataFrame com colunas ['cidade', 'contagem'].
+    """
+    df_contagem_cidades, nivel, limites = _enquadrar_municipios(df_contagem_cidades)
+    return _renderizador_municipios(nivel).renderizar(df_contagem_cidades, limites)
 
 
 def grafico_barras_empilhadas(df, x, y, grupo, titulo, altura=400):
@@ -476,7 +712,7 @@ def mapa_pontos_matplotlib(df_pontos, titulo='Distribuição nacional dos Pontos
     """
     Mapa estatico com o Brasil e marcadores de Pontos/Pontoes.
     """
-    gdf_estados = _carregar_gdf_estados().copy()
+    gdf_estados = _estados_no_nivel()
 
     if 'latitude' in df_pontos.columns and 'longitude' in df_pontos.columns:
         df_valid = df_pontos.dropna(subset=['latitude', 'longitude']).copy()
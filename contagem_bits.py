@@ -0,0 +1,70 @@
+import numpy as np
+
+# Popcount por byte (np.bitwise_count só existe a partir do numpy 2.0).
+_POPCOUNT_BYTE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def compactar_mascara(mascara):
+    """Máscara booleana de linhas -> bytes (8 linhas por byte, mesma ordem de `np.packbits`)."""
+    return np.packbits(np.asarray(mascara, dtype=bool))
+
+
+def mascara_de_posicoes(posicoes, n_linhas):
+    mascara = np.zeros(n_linhas, dtype=bool)
+    mascara[posicoes] = True
+    return compactar_mascara(mascara)
+
+
+class MatrizBits:
+    """
+    Colunas booleanas guardadas compactadas, uma linha de bytes por coluna
+    (1/8 da memória de um array bool). Contar os "Sim" de várias colunas nas
+    linhas de uma máscara é um AND seguido de popcount, tudo vetorizado.
+    """
+
+    def __init__(self, n_linhas, n_colunas):
+        self.n_linhas = n_linhas
+        self.bits = np.zeros((n_colunas, (n_linhas + 7) // 8), dtype=np.uint8)
+        self.totais = np.zeros(n_colunas, dtype=np.int64)
+
+    @classmethod
+    def de_matriz(cls, matriz):
+        """Constrói a partir de uma matriz booleana (linhas x colunas)."""
+        matriz = np.asarray(matriz, dtype=bool)
+        obj = cls(matriz.shape[0], matriz.shape[1])
+        for i in range(matriz.shape[1]):
+            obj.definir_coluna(i, matriz[:, i])
+        return obj
+
+    def definir_coluna(self, i, valores):
+        valores = np.asarray(valores, dtype=bool)
+        self.bits[i] = np.packbits(valores)
+        self.totais[i] = int(valores.sum())
+
+    def contar(self, mascara_compactada=None, colunas=None):
+        """
+        Total de bits ligados por coluna dentro da máscara (já compactada).
+        Sem máscara devolve os totais da base. `colunas` são posições.
+        """
+        if mascara_compactada is None:
+            return self.totais if colunas is None else self.totais[colunas]
+        bits = self.bits if colunas is None else self.bits[colunas]
+        return _POPCOUNT_BYTE[bits & mascara_compactada].sum(axis=1, dtype=np.int64)
+
+    def contar_uniao(self, mascara_compactada, colunas):
+        """Linhas (dentro da máscara) com ao menos uma das colunas marcada."""
+        if len(colunas) == 0:
+            return 0
+        uniao = np.bitwise_or.reduce(self.bits[colunas], axis=0)
+        if mascara_compactada is not None:
+            uniao = uniao & mascara_compactada
+        return int(_POPCOUNT_BYTE[uniao].sum(dtype=np.int64))
+
+    def contar_lote(self, mascaras_compactadas, colunas=None):
+        """
+        Contagens de muitas colunas sob várias máscaras: matriz (máscaras x
+        colunas). Cada linha é um `contar`, que já conta todas as colunas de uma vez.
+        """
+        contagens = [self.contar(mascara, colunas) for mascara in mascaras_compactadas]
+        n_colunas = len(self.totais) if colunas is None else len(colunas)
+        return np.vstack(contagens) if contagens else np.zeros((0, n_colunas), dtype=np.int64)
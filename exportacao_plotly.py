@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+
+def _aquecer_kaleido():
+    # A primeira exportação sobe o executável do kaleido; fazemos isso uma vez só.
+    pio.to_image(go.Figure(), format="png", width=10, height=10)
+
+
+def _renderizar_json(fig_json, scale):
+    inicio = time.perf_counter()
+    try:
+        fig = pio.from_json(fig_json, skip_invalid=True)
+        img_bytes = fig.to_image(format="png", scale=scale)
+    except Exception:
+        img_bytes = None
+    return img_bytes, time.perf_counter() - inicio
+
+
+class ServicoExportacaoPlotly:
+    """
+    Exportação de figuras Plotly em PNG pelo subprocesso do kaleido, que é
+    aquecido em segundo plano na criação. O kaleido 0.2 atende uma figura por
+    vez, então as figuras de um relatório são exportadas em série e relatórios
+    de sessões simultâneas esperam uns pelos outros (lock). O ganho está em
+    não pagar a partida do kaleido no primeiro relatório; o cache de PNG em
+    `relatorio_pagina` evita reexportar figuras iguais.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._aquecido = threading.Event()
+        threading.Thread(target=self._aquecer, daemon=True).start()
+
+    def _aquecer(self):
+        try:
+            with self._lock:
+                _aquecer_kaleido()
+        except Exception:
+            logger.exception("Falha ao aquecer o exportador de gráficos.")
+        finally:
+            self._aquecido.set()
+
+    def renderizar_lote(self, figuras, scale=2):
+        """
+        Recebe `[(titulo, fig_json), ...]` e devolve `[png_bytes | None, ...]`
+        na mesma ordem.
+        """
+        if not figuras:
+            return []
+        self._aquecido.wait(timeout=60)
+        inicio = time.perf_counter()
+        with self._lock:
+            resultados = [_renderizar_json(fig_json, scale) for _, fig_json in figuras]
+
+        for (titulo, _), (img_bytes, segundos) in zip(figuras, resultados):
+            logger.info("Exportação PNG %.3fs%s: %s", segundos, "" if img_bytes else " (falhou)", titulo)
+        logger.info("Lote de %d figura(s) exportado em %.3fs.", len(figuras), time.perf_counter() - inicio)
+        return [img_bytes for img_bytes, _ in resultados]
+
+
+@st.cache_resource(show_spinner=False)
+def obter_servico_exportacao():
+    return ServicoExportacaoPlotly()
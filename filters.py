@@ -2,9 +2,11 @@
 
 import streamlit as st
 
-from config import FAIXAS_RECEITA, ORDEM_FAIXA_POPULACIONAL, SIGLA_PARA_ESTADO_NOME
+from config import FAIXAS_RECEITA, SIGLA_PARA_ESTADO_NOME
+from indice_filtros import obter_indice_filtros
+from opcoes_filtros import opcoes_para, rotulo_acao
 from texto_para_filtros import interpretar_solicitacao_texto, tem_algum_filtro
-from utils import ACOES_ESTRUTURANTES, aplicar_filtros
+from utils import chave_filtros, mascara_filtros, obter_base_filtrada
 
 
 def _fmt_int(valor):
@@ -47,10 +49,51 @@ def _renderizar_chips_sidebar(st_container, titulo, valores, max_itens=5):
     st_container.markdown(f'<div class="cv-chip-wrap">{chips}</div>', unsafe_allow_html=True)
 
 
+def _filtros_da_sessao(get_key):
+    """Filtros correspondentes ao estado atual dos widgets (antes de renderizá-los)."""
+    tipo = st.session_state.get(get_key('tipo'))
+    registro = st.session_state.get(get_key('registro'))
+    return {
+        'estado': st.session_state.get(get_key('estado'), []),
+        'regiao': st.session_state.get(get_key('regiao'), []),
+        'municipio': st.session_state.get(get_key('municipio'), []),
+        'faixa_populacional': st.session_state.get(get_key('pop'), []),
+        'tipo_ponto': [tipo] if tipo else [],
+        'registro': [registro] if registro else [],
+        'acoes_estruturantes': st.session_state.get(get_key('acao'), []),
+        'linguagem_artistica': st.session_state.get(get_key('linguagem'), []),
+        'faixa_receita': st.session_state.get(get_key('receita'), []),
+        'filtros_booleanos': {},
+        'acessos_recursos_or': st.session_state.get(get_key('acessos_recursos_or'), []),
+    }
+
+
+def _formatador_com_contagem(contagens, rotulo=str):
+    """format_func que acrescenta "(n)" ao rótulo quando há contagem para a opção."""
+    def formatar(valor):
+        texto = rotulo(valor)
+        if valor in contagens:
+            return f'{texto} ({_fmt_int(contagens[valor])})'
+        return texto
+    return formatar
+
+
+def _resetar_filtros():
+    keys_reset = [k for k in st.session_state.keys() if k.startswith('input_')]
+    for key in keys_reset:
+        st.session_state.pop(key, None)
+    st.session_state.pop('filtros_globais', None)
+    st.session_state.pop('_texto_para_filtros_pending', None)
+    st.session_state.pop('_texto_para_filtros_feedback', None)
+    st.session_state.pop('_filtros_aplicar_pending', None)
+    st.session_state['_filtros_ui_version'] = st.session_state.get('_filtros_ui_version', 0) + 1
+
+
 def renderizar_painel_filtros(df):
     """
     Renderiza o painel de filtros e salva em st.session_state['filtros_globais'].
-    Também exibe um resumo da seleção na barra lateral.
+    A seleção é editada num fragmento e só vale para a página após "Aplicar".
+    Também exibe um resumo dos filtros aplicados na barra lateral.
     """
 
     ui_version = st.session_state.get('_filtros_ui_version', 0)
@@ -70,36 +113,13 @@ def renderizar_painel_filtros(df):
     header_text = '🔎 Filtros Estratégicos da Base de Dados da Pesquisa'
 
     with st.expander(header_text, expanded=False):
-        if 'linguagens_lista' in df.columns:
-            contagem_linguagens = df['linguagens_lista'].explode().value_counts()
-            opcoes_linguagens = sorted(contagem_linguagens[contagem_linguagens >= 10].index.tolist())
-        else:
-            opcoes_linguagens = []
-
-        colunas_acao = []
-        pergunta_acao = (
-            '10. As atividades do Ponto de Cultura estão relacionadas diretamente '
-            'com quais ações estruturante da Política Nacional de Cultura Viva?'
-        )
-
-        for coluna in df.columns:
-            texto = str(coluna)
-            if texto in ACOES_ESTRUTURANTES or 'ações estruturante' in texto or 'acoes estruturante' in texto:
-                if texto.strip() == pergunta_acao:
-                    continue
-                colunas_acao.append(coluna)
-
-        def rotulo_acao(coluna):
-            texto = str(coluna)
-            if '(' in texto and ')' in texto:
-                return texto.split('(', 1)[1].rsplit(')', 1)[0].strip()
-            return texto.replace(pergunta_acao, '').strip(' -')
-
-        opcoes_estado = sorted(df['estado'].dropna().unique())
-        opcoes_regiao = sorted(df['regiao'].dropna().unique())
-        opcoes_municipio_todas = sorted(df['cidade'].dropna().unique())
-        opcoes_tipo = sorted(df['tipo_ponto'].dropna().unique())
-        opcoes_registro = sorted(df['registro'].dropna().unique())
+        opcoes = opcoes_para(df)
+        opcoes_linguagens = opcoes.linguagens
+        colunas_acao = opcoes.colunas_acao
+        opcoes_estado = opcoes.estados
+        opcoes_regiao = opcoes.regioes
+        opcoes_tipo = opcoes.tipos
+        opcoes_registro = opcoes.registros
 
         def _rotulo_registro(valor):
             txt = str(valor)
@@ -122,12 +142,7 @@ def renderizar_painel_filtros(df):
         ]
         mapa_label_recurso = {k: v for k, v in opcoes_acessos_recursos}
 
-        mapa_acao_rotulo_coluna = {}
-        for coluna_acao in colunas_acao:
-            rotulo = rotulo_acao(coluna_acao)
-            if rotulo and rotulo not in mapa_acao_rotulo_coluna:
-                mapa_acao_rotulo_coluna[rotulo] = coluna_acao
-        opcoes_acao_texto = list(mapa_acao_rotulo_coluna.keys())
+        mapa_acao_rotulo_coluna = opcoes.coluna_por_rotulo_acao
 
         feedback_texto = st.session_state.pop('_texto_para_filtros_feedback', None)
         if isinstance(feedback_texto, dict) and feedback_texto.get('texto'):
@@ -230,18 +245,7 @@ def renderizar_painel_filtros(df):
                 if not texto_solicitacao.strip():
                     st.warning('Digite uma solicitação para aplicar os filtros automaticamente.')
                 else:
-                    catalogo_llm = {
-                        'estado': opcoes_estado,
-                        'regiao': opcoes_regiao,
-                        'municipio': opcoes_municipio_todas,
-                        'faixa_populacional': [f for f in ORDEM_FAIXA_POPULACIONAL if f in df['faixa_populacional'].unique()],
-                        'acoes_estruturantes': opcoes_acao_texto,
-                        'linguagem_artistica': opcoes_linguagens,
-                        'faixa_receita': FAIXAS_RECEITA,
-                        'tipo_ponto': opcoes_tipo,
-                        'registro': opcoes_registro,
-                        'filtros_booleanos': ['Sim', 'Não'],
-                    }
+                    catalogo_llm = opcoes.catalogo_llm()
 
                     with st.spinner('Analisando sua solicitação...', show_time=True):
                         resultado_llm = interpretar_solicitacao_texto(texto_solicitacao, catalogo_llm)
@@ -292,9 +296,7 @@ def renderizar_painel_filtros(df):
                         }
 
                         if selecao_widgets['estado']:
-                            cidades_validas_estado = sorted(
-                                df[df['estado'].isin(selecao_widgets['estado'])]['cidade'].dropna().unique()
-                            )
+                            cidades_validas_estado = set(opcoes.cidades_de(selecao_widgets['estado']))
                             selecao_widgets['municipio'] = [
                                 cidade for cidade in selecao_widgets['municipio'] if cidade in cidades_validas_estado
                             ]
@@ -305,6 +307,7 @@ def renderizar_painel_filtros(df):
                             )
                         else:
                             st.session_state['_texto_para_filtros_pending'] = selecao_widgets
+                            st.session_state['_filtros_aplicar_pending'] = True
                             st.session_state['_texto_para_filtros_feedback'] = {
                                 'tipo': 'success',
                                 'texto': 'Solicitação aplicada com sucesso. Os filtros foram preenchidos automaticamente.',
@@ -313,91 +316,169 @@ def renderizar_painel_filtros(df):
                             st.rerun()
 
         st.markdown('#### Filtros')
-        col_1, col_2, col_3 = st.columns(3)
-
-        with col_1:
-            estados_preselecionados = st.session_state.get(get_key('estado'), [])
-            cidades_disponiveis = df['cidade'].dropna().unique()
-            if estados_preselecionados:
-                cidades_disponiveis = df[df['estado'].isin(estados_preselecionados)]['cidade'].dropna().unique()
-            sel_cidades = st.multiselect(
-                'Município',
-                options=sorted(cidades_disponiveis),
-                placeholder='Todos',
-                key=get_key('municipio'),
-            )
-            sel_estados = st.multiselect(
-                'Estado',
-                options=opcoes_estado,
-                format_func=_rotulo_estado_sigla,
-                placeholder='Todos',
-                key=get_key('estado'),
-            )
-            sel_regiao = st.multiselect('Região', options=opcoes_regiao, placeholder='Todas', key=get_key('regiao'))
-
-            opcoes_faixa_pop = [f for f in ORDEM_FAIXA_POPULACIONAL if f in df['faixa_populacional'].unique()]
-            sel_pop = st.multiselect(
-                'Faixa populacional',
-                options=opcoes_faixa_pop,
-                placeholder='Todas',
-                key=get_key('pop'),
-            )
 
-        with col_2:
-            sel_acao = st.multiselect(
-                'Ação estruturante',
-                options=colunas_acao,
-                format_func=rotulo_acao,
-                placeholder='Todas',
-                key=get_key('acao'),
-            )
-            sel_linguagem = st.multiselect(
-                'Linguagem artística',
-                options=opcoes_linguagens,
-                placeholder='Todas',
-                key=get_key('linguagem'),
-            )
-            sel_receita = st.multiselect(
-                'Faixa de receita anual',
-                options=FAIXAS_RECEITA,
-                placeholder='Todas',
-                key=get_key('receita'),
-            )
-            sel_acessos_recursos = st.multiselect(
-                'Acesso a recursos',
-                options=[k for k, _ in opcoes_acessos_recursos],
-                format_func=lambda k: mapa_label_recurso.get(k, k),
-                placeholder='Todas',
-                key=get_key('acessos_recursos_or'),
-            )
+        @st.fragment
+        def editar_filtros():
+            # Mudanças nos widgets reexecutam só este fragmento (contagens ao vivo);
+            # a página só é refeita em "Aplicar".
+            # Quantos registros cada opção traria, mantidos os demais filtros (facetas).
+            indice_filtros = obter_indice_filtros()
+            facetas = indice_filtros.contagens_facetadas(_filtros_da_sessao(get_key)) if indice_filtros.cobre(df) else {}
+
+            col_1, col_2, col_3 = st.columns(3)
+
+            with col_1:
+                # A busca roda no servidor: o widget recebe só os selecionados e as melhores sugestões.
+                # `text_input` só envia o termo com Enter ou ao sair do campo; as sugestões
+                # abaixo são refeitas nesse momento (a digitação no multiselect filtra só elas).
+                termo_municipio = st.text_input(
+                    'Buscar município',
+                    placeholder='Digite o nome e tecle Enter',
+                    help='Tecle Enter para atualizar as sugestões da lista de municípios.',
+                    key=get_key('municipio_busca'),
+                )
+                sel_cidades = st.multiselect(
+                    'Município',
+                    options=opcoes.sugerir_municipios(
+                        termo_municipio,
+                        st.session_state.get(get_key('estado'), []),
+                        st.session_state.get(get_key('municipio'), []),
+                    ),
+                    format_func=_formatador_com_contagem(facetas.get('municipio', {})),
+                    placeholder='Todos',
+                    key=get_key('municipio'),
+                    label_visibility='collapsed',
+                )
+                sel_estados = st.multiselect(
+                    'Estado',
+                    options=opcoes_estado,
+                    format_func=_formatador_com_contagem(facetas.get('estado', {}), _rotulo_estado_sigla),
+                    placeholder='Todos',
+                    key=get_key('estado'),
+                )
+                sel_regiao = st.multiselect(
+                    'Região',
+                    options=opcoes_regiao,
+                    format_func=_formatador_com_contagem(facetas.get('regiao', {})),
+                    placeholder='Todas',
+                    key=get_key('regiao'),
+                )
+
+                sel_pop = st.multiselect(
+                    'Faixa populacional',
+                    options=opcoes.faixas_populacionais,
+                    format_func=_formatador_com_contagem(facetas.get('faixa_populacional', {})),
+                    placeholder='Todas',
+                    key=get_key('pop'),
+                )
+
+            with col_2:
+                sel_acao = st.multiselect(
+                    'Ação estruturante',
+                    options=colunas_acao,
+                    format_func=_formatador_com_contagem(facetas.get('acoes_estruturantes', {}), rotulo_acao),
+                    placeholder='Todas',
+                    key=get_key('acao'),
+                )
+                sel_linguagem = st.multiselect(
+                    'Linguagem artística',
+                    options=opcoes_linguagens,
+                    format_func=_formatador_com_contagem(facetas.get('linguagem_artistica', {})),
+                    placeholder='Todas',
+                    key=get_key('linguagem'),
+                )
+                sel_receita = st.multiselect(
+                    'Faixa de receita anual',
+                    options=FAIXAS_RECEITA,
+                    format_func=_formatador_com_contagem(facetas.get('faixa_receita', {})),
+                    placeholder='Todas',
+                    key=get_key('receita'),
+                )
+                sel_acessos_recursos = st.multiselect(
+                    'Acesso a recursos',
+                    options=[k for k, _ in opcoes_acessos_recursos],
+                    format_func=_formatador_com_contagem(
+                        facetas.get('acessos_recursos_or', {}), lambda k: mapa_label_recurso.get(k, k)
+                    ),
+                    placeholder='Todas',
+                    key=get_key('acessos_recursos_or'),
+                )
+
+            with col_3:
+                sel_tipo = st.pills(
+                    'Tipo de Estabelecimento',
+                    options=opcoes_tipo,
+                    selection_mode='single',
+                    key=get_key('tipo'),
+                    format_func=_formatador_com_contagem(facetas.get('tipo_ponto', {})),
+                )
+                sel_registro = st.pills(
+                    'Cadastro jurídico',
+                    options=opcoes_registro,
+                    selection_mode='single',
+                    key=get_key('registro'),
+                    format_func=_formatador_com_contagem(facetas.get('registro', {}), _rotulo_registro),
+                )
+
+            filtros_editados = {
+                'estado': sel_estados,
+                'regiao': sel_regiao,
+                'municipio': sel_cidades,
+                'faixa_populacional': sel_pop,
+                'tipo_ponto': [sel_tipo] if sel_tipo else [],
+                'registro': [sel_registro] if sel_registro else [],
+                'acoes_estruturantes': sel_acao,
+                'linguagem_artistica': sel_linguagem,
+                'faixa_receita': sel_receita,
+                'filtros_booleanos': {},
+                'acessos_recursos_or': sel_acessos_recursos,
+            }
 
-        with col_3:
-            sel_tipo = st.pills('Tipo de Estabelecimento', options=opcoes_tipo, selection_mode='single', key=get_key('tipo'))
-            sel_registro = st.pills(
-                'Cadastro jurídico',
-                options=opcoes_registro,
-                selection_mode='single',
-                key=get_key('registro'),
-                format_func=_rotulo_registro,
+            if st.session_state.pop('_filtros_aplicar_pending', False) or 'filtros_globais' not in st.session_state:
+                st.session_state['filtros_globais'] = filtros_editados
+            pendente = chave_filtros(filtros_editados) != chave_filtros(st.session_state['filtros_globais'])
+
+            if indice_filtros.cobre(df):
+                contagem_editada = indice_filtros.contar(filtros_editados)
+            else:
+                contagem_editada = int(mascara_filtros(df, filtros_editados).sum())
+            # Calculado aqui para acompanhar as edições que só reexecutam o fragmento.
+            any_filter_active = any(
+                bool(valor)
+                for selecao in (filtros_editados, st.session_state['filtros_globais'])
+                for valor in selecao.values()
             )
+            col_previa, col_aplicar, col_resetar = st.columns([3, 1, 1], vertical_alignment='center')
+            with col_previa:
+                texto_previa = f'**{_fmt_int(contagem_editada)}** de {_fmt_int(len(df))} registros nesta seleção.'
+                if pendente:
+                    texto_previa += ' Clique em **Aplicar** para atualizar a página.'
+                st.markdown(texto_previa)
+            with col_aplicar:
+                if st.button(
+                    'Aplicar',
+                    key=get_key('aplicar_filtros'),
+                    type='primary',
+                    disabled=not pendente,
+                    use_container_width=True,
+                ):
+                    st.session_state['filtros_globais'] = filtros_editados
+                    st.rerun(scope='app')
+            with col_resetar:
+                if st.button(
+                    'Resetar filtros',
+                    key=get_key('resetar_filtros'),
+                    disabled=not any_filter_active,
+                    use_container_width=True,
+                ):
+                    _resetar_filtros()
+                    st.rerun(scope='app')
 
-    filtros = {
-        'estado': sel_estados,
-        'regiao': sel_regiao,
-        'municipio': sel_cidades,
-        'faixa_populacional': sel_pop,
-        'tipo_ponto': [sel_tipo] if sel_tipo else [],
-        'registro': [sel_registro] if sel_registro else [],
-        'acoes_estruturantes': sel_acao,
-        'linguagem_artistica': sel_linguagem,
-        'faixa_receita': sel_receita,
-        'filtros_booleanos': {},
-        'acessos_recursos_or': sel_acessos_recursos,
-    }
+        editar_filtros()
 
-    st.session_state['filtros_globais'] = filtros
+    filtros = st.session_state['filtros_globais']
 
-    filtrado = aplicar_filtros(df, filtros)
+    filtrado = obter_base_filtrada(filtros)
     count_filtros = len(filtrado)
     total_filtros = len(df)
     total_municipios_base = df['cidade'].nunique() if 'cidade' in df.columns else 0
@@ -454,49 +535,30 @@ def renderizar_painel_filtros(df):
         if count_filtros < total_filtros:
             st.markdown('### Filtros Ativos:')
 
-            if sel_regiao:
-                _renderizar_chips_sidebar(st, 'Região', sel_regiao)
-            if sel_estados:
-                _renderizar_chips_sidebar(st, 'Estado', [_rotulo_estado_sigla(s) for s in sel_estados])
-            if sel_cidades:
-                _renderizar_chips_sidebar(st, 'Município', sel_cidades)
-            if sel_pop:
-                _renderizar_chips_sidebar(st, 'População', sel_pop)
-            if sel_tipo:
-                _renderizar_chips_sidebar(st, 'Tipo', [sel_tipo], max_itens=1)
-            if sel_registro:
-                _renderizar_chips_sidebar(st, 'Jurídico', [sel_registro], max_itens=1)
-            if sel_acao:
-                _renderizar_chips_sidebar(st, 'Ação Estruturante', [rotulo_acao(item) for item in sel_acao])
-            if sel_linguagem:
-                _renderizar_chips_sidebar(st, 'Linguagem', sel_linguagem)
-            if sel_receita:
-                _renderizar_chips_sidebar(st, 'Receita', sel_receita)
-
-            bool_active = [mapa_label_recurso.get(chave, chave) for chave in (sel_acessos_recursos or [])]
+            if filtros.get('regiao'):
+                _renderizar_chips_sidebar(st, 'Região', filtros['regiao'])
+            if filtros.get('estado'):
+                _renderizar_chips_sidebar(st, 'Estado', [_rotulo_estado_sigla(s) for s in filtros['estado']])
+            if filtros.get('municipio'):
+                _renderizar_chips_sidebar(st, 'Município', filtros['municipio'])
+            if filtros.get('faixa_populacional'):
+                _renderizar_chips_sidebar(st, 'População', filtros['faixa_populacional'])
+            if filtros.get('tipo_ponto'):
+                _renderizar_chips_sidebar(st, 'Tipo', filtros['tipo_ponto'], max_itens=1)
+            if filtros.get('registro'):
+                _renderizar_chips_sidebar(st, 'Jurídico', filtros['registro'], max_itens=1)
+            if filtros.get('acoes_estruturantes'):
+                _renderizar_chips_sidebar(st, 'Ação Estruturante', [rotulo_acao(item) for item in filtros['acoes_estruturantes']])
+            if filtros.get('linguagem_artistica'):
+                _renderizar_chips_sidebar(st, 'Linguagem', filtros['linguagem_artistica'])
+            if filtros.get('faixa_receita'):
+                _renderizar_chips_sidebar(st, 'Receita', filtros['faixa_receita'])
+
+            bool_active = [mapa_label_recurso.get(chave, chave) for chave in (filtros.get('acessos_recursos_or') or [])]
 
             if bool_active:
                 _renderizar_chips_sidebar(st, 'Específicos', bool_active)
 
-        # Verificar se há qualquer filtro ativo para habilitar o reset
-        any_filter_active = any([
-            sel_estados, sel_regiao, sel_cidades, sel_pop, sel_acao, sel_linguagem, sel_receita,
-            sel_tipo is not None,
-            sel_registro is not None,
-            bool(sel_acessos_recursos),
-        ])
-
-        st.markdown('<div style="height: 0.75rem;"></div>', unsafe_allow_html=True)
-        if st.button('Resetar filtros', use_container_width=True, disabled=not any_filter_active):
-            keys_reset = [k for k in st.session_state.keys() if k.startswith('input_')]
-            for key in keys_reset:
-                st.session_state.pop(key, None)
-            st.session_state.pop('filtros_globais', None)
-            st.session_state.pop('_texto_para_filtros_pending', None)
-            st.session_state.pop('_texto_para_filtros_feedback', None)
-            st.session_state['_filtros_ui_version'] = st.session_state.get('_filtros_ui_version', 0) + 1
-            st.rerun()
-
     return filtros
 
 
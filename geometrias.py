@@ -0,0 +1,154 @@
+"""
+Geometrias municipais simplificadas, gravadas em GeoParquet dentro de assets/.
+
+O mapa "Por Município" lia os polígonos em resolução cheia do geobr, baixados
+da internet a cada cache frio. Este módulo gera uma vez um arquivo local já
+simplificado (ordenado pelo código IBGE) e o app passa a ler só esse arquivo.
+Sem o arquivo (ele não é versionado), o app recorre ao geobr uma vez por
+processo e tenta gravá-lo para as próximas partidas.
+O arquivo guarda uma coluna de geometria por nível de detalhe
+(`NIVEIS_DETALHE`); os mapas escolhem o nível pela extensão enquadrada.
+
+Uso: python geometrias.py [--ano 2022] [--saida assets/br_municipios.parquet]
+"""
+import argparse
+import logging
+import os
+import time
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+CAMINHO_MUNICIPIOS = os.path.join(DIRETORIO_BASE, 'assets', 'br_municipios.parquet')
+ANO_MALHA = 2022
+# Tolerâncias de simplificação (graus), da mais fina para a mais grossa. Em
+# `shapely.coverage_simplify` equivalem à raiz da área dos triângulos removidos.
+NIVEIS_DETALHE = (0.002, 0.01, 0.03)
+# Largura aproximada do mapa em pixels (figura de 12 polegadas): o nível
+# escolhido é o mais grosso cuja tolerância ainda fica abaixo de um pixel.
+LARGURA_MAPA_PX = 1200
+COLUNAS_MUNICIPIOS = ['code_muni', 'name_muni', 'abbrev_state', 'geometry']
+
+
+def _coluna_nivel(i):
+    return 'geometry' if i == 0 else f'geometry_{i}'
+
+
+def nivel_para_extensao(largura_graus, niveis=NIVEIS_DETALHE):
+    """Tolerância adequada para enquadrar `largura_graus` de longitude."""
+    limite = largura_graus / LARGURA_MAPA_PX
+    adequados = [nivel for nivel in niveis if nivel <= limite]
+    return max(adequados) if adequados else min(niveis)
+
+
+def simplificar_cobertura(geometria, tolerancia):
+    """
+    Simplifica a malha como cobertura: cada fronteira compartilhada é
+    simplificada uma única vez e vale para os dois vizinhos, então não surgem
+    frestas nem sobreposições entre polígonos (o que `simplify` por geometria,
+    mesmo com `preserve_topology`, não garante). Entradas que não formam uma
+    cobertura válida (ex.: GeoJSON de estados com sobreposições) são
+    simplificadas polígono a polígono, com aviso no log.
+    """
+    geometrias_array = np.asarray(geometria.values)
+    if not shapely.coverage_is_valid(geometrias_array):
+        logger.warning('Malha não forma uma cobertura válida; simplificando polígono a polígono.')
+        return geometria.simplify(tolerancia, preserve_topology=True)
+    simplificadas = shapely.coverage_simplify(geometrias_array, tolerancia)
+    return gpd.GeoSeries(simplificadas, index=geometria.index, crs=geometria.crs)
+
+
+def em_niveis(gdf, niveis=NIVEIS_DETALHE):
+    """
+    `{tolerância: GeoDataFrame}` com as mesmas linhas em cada nível. Usa as
+    colunas pré-calculadas do arquivo; as que faltarem (arquivo antigo, malha
+    de estados) são simplificadas aqui.
+    """
+    atributos = [c for c in gdf.columns if not c.startswith('geometry')]
+    saida = {}
+    for i, nivel in enumerate(niveis):
+        coluna = _coluna_nivel(i)
+        if i == 0 and _coluna_nivel(1) in gdf.columns:
+            geometria = gdf.geometry
+        elif i > 0 and coluna in gdf.columns:
+            geometria = gpd.GeoSeries(gdf[coluna], crs=gdf.crs)
+        else:
+            geometria = simplificar_cobertura(gdf.geometry, nivel)
+        saida[nivel] = gpd.GeoDataFrame(gdf[atributos].copy(), geometry=geometria.values, crs=gdf.crs)
+    return saida
+
+
+def _baixar_municipios(ano=ANO_MALHA):
+    import geobr
+    return geobr.read_municipality(year=ano)
+
+
+def simplificar_municipios(gdf, niveis=NIVEIS_DETALHE):
+    """Mantém só as colunas usadas pelo mapa e simplifica a malha, como cobertura, em cada nível."""
+    gdf = gdf[COLUNAS_MUNICIPIOS].copy()
+    gdf['code_muni'] = gdf['code_muni'].astype('int64')
+    gdf = gdf.sort_values('code_muni').reset_index(drop=True)
+    original = gdf.geometry
+    for i, nivel in reversed(list(enumerate(niveis))):
+        gdf[_coluna_nivel(i)] = simplificar_cobertura(original, nivel)
+    return gdf.set_geometry('geometry')
+
+
+def gerar_geometrias_municipios(ano=ANO_MALHA, niveis=NIVEIS_DETALHE, caminho=CAMINHO_MUNICIPIOS, gdf=None):
+    """Baixa (ou recebe) a malha municipal, simplifica e grava o GeoParquet. Retorna o GeoDataFrame."""
+    if gdf is None:
+        gdf = _baixar_municipios(ano)
+    gdf = simplificar_municipios(gdf, niveis)
+    temporario = caminho + '.tmp'
+    gdf.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+    return gdf
+
+
+def carregar_municipios(caminho=CAMINHO_MUNICIPIOS):
+    """
+    Lê o GeoParquet local. Sem o arquivo, baixa a malha via geobr e tenta
+    gravá-lo; se nem isso for possível, levanta FileNotFoundError.
+    """
+    inicio = time.perf_counter()
+    if os.path.exists(caminho):
+        gdf = gpd.read_parquet(caminho)
+        logger.info('Malha municipal lida de %s em %.0f ms.', caminho, (time.perf_counter() - inicio) * 1000)
+        return gdf
+
+    logger.warning('Malha municipal local ausente (%s); baixando via geobr.', caminho)
+    try:
+        gdf = _baixar_municipios()
+    except Exception as erro:
+        raise FileNotFoundError(
+            f'Malha municipal não encontrada em {caminho} e o download via geobr falhou. '
+            'Gere o arquivo com "python geometrias.py".'
+        ) from erro
+    try:
+        return gerar_geometrias_municipios(caminho=caminho, gdf=gdf)
+    except Exception:
+        logger.warning('Não foi possível gravar a malha municipal simplificada.', exc_info=True)
+        return simplificar_municipios(gdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera a malha municipal simplificada em GeoParquet.')
+    parser.add_argument('--ano', type=int, default=ANO_MALHA)
+    parser.add_argument('--saida', default=CAMINHO_MUNICIPIOS)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    gdf = gerar_geometrias_municipios(args.ano, caminho=args.saida)
+    tamanho_mb = os.path.getsize(args.saida) / 1e6
+    print(
+        f'Malha gravada em {args.saida}: {len(gdf)} municípios, {tamanho_mb:.1f} MB '
+        f'({time.perf_counter() - inicio:.1f}s).'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import ACOES_ESTRUTURANTES, base_compartilhada, para_bool
+
+# Dimensão do filtro -> coluna da base tratada.
+DIMENSOES_CATEGORICAS = {
+    'estado': 'estado',
+    'municipio': 'cidade',
+    'regiao': 'regiao',
+    'faixa_populacional': 'faixa_populacional',
+    'tipo_ponto': 'tipo_ponto',
+    'registro': 'registro',
+    'faixa_receita': 'faixa_receita',
+}
+
+FLAGS_RECURSOS = [
+    'rec_federal',
+    'rec_estadual',
+    'rec_municipal',
+    'rec_minc',
+    'pnab_estadual',
+    'pnab_municipal',
+    'tcc_est_ponto',
+    'tcc_est_pontao',
+    'tcc_mun_ponto',
+    'tcc_mun_pontao',
+]
+
+
+class IndiceLinguagens:
+    """
+    `linguagens_lista` em formato CSR: `offsets` (n + 1) delimita, em `codigos`,
+    as linguagens de cada linha. Um índice invertido (linguagem -> linhas)
+    deixa o filtro proporcional ao número de linhas encontradas.
+    """
+
+    def __init__(self, serie_listas):
+        listas = [list(itens) if isinstance(itens, (list, tuple)) else [] for itens in serie_listas.to_numpy()]
+        self.n = len(listas)
+        self.vocabulario = sorted({item for itens in listas for item in itens})
+        self.codigo = {item: i for i, item in enumerate(self.vocabulario)}
+
+        tamanhos = np.fromiter((len(itens) for itens in listas), dtype=np.int64, count=self.n)
+        self.offsets = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=self.offsets[1:])
+        self.codigos = np.fromiter(
+            (self.codigo[item] for itens in listas for item in itens), dtype=np.int32, count=int(self.offsets[-1])
+        )
+        # Linha de cada entrada de `codigos` (para contagens sob uma máscara).
+        self.linha_da_entrada = np.repeat(np.arange(self.n, dtype=np.int64), tamanhos)
+
+        ordem = np.argsort(self.codigos, kind='stable')
+        limites = np.searchsorted(self.codigos[ordem], np.arange(len(self.vocabulario) + 1))
+        linhas_ordenadas = self.linha_da_entrada[ordem]
+        self.invertido = {
+            item: np.unique(linhas_ordenadas[limites[i]:limites[i + 1]])
+            for i, item in enumerate(self.vocabulario)
+        }
+
+    def linhas_com(self, linguagens):
+        """Linhas que têm ao menos uma das linguagens."""
+        partes = [self.invertido[item] for item in linguagens if item in self.invertido]
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        return partes[0] if len(partes) == 1 else np.unique(np.concatenate(partes))
+
+    def mascara(self, linguagens):
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[self.linhas_com(linguagens)] = True
+        return mascara
+
+    def contagens(self, mascara=None):
+        """Número de linhas por linguagem (dentro da máscara, se informada)."""
+        codigos = self.codigos if mascara is None else self.codigos[mascara[self.linha_da_entrada]]
+        totais = np.bincount(codigos, minlength=len(self.vocabulario))
+        return pd.Series(totais, index=self.vocabulario, dtype='int64')
+
+
+class IndiceFiltros:
+    """
+    Índice de bitmaps (um vetor booleano por valor) sobre a base tratada.
+    Um conjunto de filtros vira algumas operações AND/OR sobre esses vetores,
+    com o mesmo resultado de `utils.mascara_filtros`.
+    """
+
+    def __init__(self, df):
+        self.n = len(df)
+        self.index = df.index
+        self._df = df
+        self._lock = threading.Lock()
+
+        self.bitmaps = {}
+        self._codigos = {}
+        self._valores = {}
+        for dimensao, coluna in DIMENSOES_CATEGORICAS.items():
+            if coluna in df.columns:
+                codigos, valores = pd.factorize(df[coluna], use_na_sentinel=True)
+                self._codigos[dimensao] = codigos
+                self._valores[dimensao] = list(valores)
+                self.bitmaps[dimensao] = {valor: codigos == i for i, valor in enumerate(valores)}
+            else:
+                self.bitmaps[dimensao] = {}
+        self.linguagens = IndiceLinguagens(
+            df['linguagens_lista'] if 'linguagens_lista' in df.columns else pd.Series([[]] * self.n, index=df.index)
+        )
+
+        # Colunas Sim/Não (ações estruturantes, recursos e filtros booleanos avulsos).
+        self._bool_colunas = {}
+        for coluna in ACOES_ESTRUTURANTES + FLAGS_RECURSOS:
+            if coluna in df.columns:
+                self._bool_colunas[coluna] = para_bool(df[coluna]).to_numpy(dtype=bool)
+
+    def bitmap_booleano(self, coluna):
+        bitmap = self._bool_colunas.get(coluna)
+        if bitmap is None:
+            with self._lock:
+                bitmap = self._bool_colunas.get(coluna)
+                if bitmap is None:
+                    bitmap = para_bool(self._df[coluna]).to_numpy(dtype=bool)
+                    self._bool_colunas[coluna] = bitmap
+        return bitmap
+
+    def _uniao(self, dimensao, valores):
+        saida = np.zeros(self.n, dtype=bool)
+        bitmaps = self.bitmaps.get(dimensao, {})
+        for valor in valores:
+            bitmap = bitmaps.get(valor)
+            if bitmap is not None:
+                saida |= bitmap
+        return saida
+
+    def _uniao_booleanas(self, colunas):
+        saida = np.zeros(self.n, dtype=bool)
+        for coluna in colunas:
+            saida |= self.bitmap_booleano(coluna)
+        return saida
+
+    def _mascaras_por_dimensao(self, filtros):
+        """Máscara de cada dimensão ativa; a máscara final é o AND de todas."""
+        mascaras = {}
+        for dimensao in DIMENSOES_CATEGORICAS:
+            if filtros.get(dimensao):
+                mascaras[dimensao] = self._uniao(dimensao, filtros[dimensao])
+        if filtros.get('linguagem_artistica'):
+            mascaras['linguagem_artistica'] = self.linguagens.mascara(filtros['linguagem_artistica'])
+
+        if filtros.get('acoes_estruturantes'):
+            selecionadas = filtros['acoes_estruturantes']
+            colunas_acao = [c for c in ACOES_ESTRUTURANTES if c in self._df.columns and c in selecionadas]
+            if colunas_acao:
+                mascaras['acoes_estruturantes'] = self._uniao_booleanas(colunas_acao)
+
+        colunas_or = [c for c in filtros.get('acessos_recursos_or', []) or [] if c in self._df.columns]
+        if colunas_or:
+            mascaras['acessos_recursos_or'] = self._uniao_booleanas(colunas_or)
+
+        for chave, coluna in filtros.get('filtros_booleanos', {}).items():
+            if coluna in self._df.columns and filtros.get(chave) in ['Sim', 'Não']:
+                bitmap = self.bitmap_booleano(coluna)
+                mascaras[('filtros_booleanos', chave)] = bitmap if filtros[chave] == 'Sim' else ~bitmap
+        return mascaras
+
+    def mascara(self, filtros):
+        mascara = np.ones(self.n, dtype=bool)
+        for parcial in self._mascaras_por_dimensao(filtros).values():
+            mascara &= parcial
+        return mascara
+
+    def contagens_facetadas(self, filtros):
+        """
+        Para cada dimensão de filtro, quantos registros cada opção traria
+        mantidos os demais filtros ativos (a própria dimensão é ignorada).
+        Retorna `{dimensao: {opcao: contagem}}`.
+        """
+        mascaras = self._mascaras_por_dimensao(filtros)
+
+        def sem(dimensao):
+            mascara = np.ones(self.n, dtype=bool)
+            for chave, parcial in mascaras.items():
+                if chave != dimensao:
+                    mascara &= parcial
+            return mascara
+
+        facetas = {}
+        for dimensao, codigos in self._codigos.items():
+            validos = codigos[sem(dimensao) & (codigos >= 0)]
+            totais = np.bincount(validos, minlength=len(self._valores[dimensao]))
+            facetas[dimensao] = dict(zip(self._valores[dimensao], totais.tolist()))
+
+        facetas['linguagem_artistica'] = self.linguagens.contagens(sem('linguagem_artistica')).to_dict()
+        for dimensao, colunas in (('acoes_estruturantes', ACOES_ESTRUTURANTES), ('acessos_recursos_or', FLAGS_RECURSOS)):
+            outras = sem(dimensao)
+            facetas[dimensao] = {
+                coluna: int(np.count_nonzero(self.bitmap_booleano(coluna) & outras))
+                for coluna in colunas if coluna in self._df.columns
+            }
+        return facetas
+
+    def linhas(self, filtros):
+        """Posições (0..n-1) das linhas que atendem aos filtros."""
+        return np.flatnonzero(self.mascara(filtros))
+
+    def contar(self, filtros):
+        """Número de linhas que atendem aos filtros."""
+        return int(np.count_nonzero(self.mascara(filtros)))
+
+    def cobre(self, df):
+        """
+        Indica se `df` é o próprio objeto indexado. Qualquer outro DataFrame,
+        mesmo cópia da base, segue pelo cálculo direto: com índice e tamanho
+        iguais ele ainda pode ter linhas reordenadas ou valores alterados.
+        """
+        return df is self._df
+
+
+@st.cache_resource(show_spinner=False)
+def obter_indice_filtros(versao_cache='v2'):
+    return IndiceFiltros(base_compartilhada(versao_cache))
+
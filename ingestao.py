@@ -0,0 +1,176 @@
+"""
+Snapshot colunar (Parquet) da base_final.csv para acelerar a partida a frio.
+
+Uso: python ingestao.py [--csv base_final.csv] [--saida base_final.parquet]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from manifesto_colunas import assinatura_manifesto, manter_coluna
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+CAMINHO_CSV = os.path.join(DIRETORIO_BASE, 'base_final.csv')
+CAMINHO_SNAPSHOT = os.path.join(DIRETORIO_BASE, 'base_final.parquet')
+# Incrementar quando mudar a forma de ler/converter o CSV, invalidando snapshots antigos.
+VERSAO_FORMATO = 2
+# Chave, nos metadados do Parquet, do registro que valida o snapshot.
+CHAVE_METADADOS = b'pontos.snapshot'
+
+
+def ler_csv(caminho_csv=CAMINHO_CSV):
+    # Colunas fora do manifesto (identificação, campos não usados) nem chegam a ser lidas.
+    return pd.read_csv(
+        caminho_csv,
+        low_memory=False,
+        encoding='utf-8-sig',
+        on_bad_lines='warn',
+        usecols=manter_coluna,
+    )
+
+
+def fingerprint_csv(caminho_csv=CAMINHO_CSV):
+    """Hash do conteúdo do CSV: não muda com checkout/deploy, muda com qualquer edição."""
+    h = hashlib.sha1()
+    with open(caminho_csv, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def fingerprint_schema(schema):
+    """Hash dos nomes e tipos Arrow das colunas (sem os metadados)."""
+    assinatura = json.dumps([[campo.name, str(campo.type)] for campo in schema], ensure_ascii=False)
+    return hashlib.sha1(assinatura.encode('utf-8')).hexdigest()
+
+
+def ler_registro(caminho_snapshot=CAMINHO_SNAPSHOT):
+    """Registro gravado nos metadados do Parquet, ou None se ausente/ilegível."""
+    try:
+        schema = pq.read_schema(caminho_snapshot)
+        return json.loads(schema.metadata[CHAVE_METADADOS]), schema
+    except (OSError, KeyError, TypeError, ValueError):
+        return None, None
+
+
+def snapshot_valido(caminho_csv=CAMINHO_CSV, caminho_snapshot=CAMINHO_SNAPSHOT):
+    if not PYARROW_DISPONIVEL or not os.path.exists(caminho_snapshot):
+        return False
+    registro, schema = ler_registro(caminho_snapshot)
+    if not registro:
+        return False
+    if registro.get('versao_formato') != VERSAO_FORMATO or registro.get('manifesto') != assinatura_manifesto():
+        return False
+    if registro.get('schema') != fingerprint_schema(schema):
+        return False
+    if not os.path.exists(caminho_csv):
+        # Deploy só com o snapshot: vale o que foi gravado.
+        return True
+    return registro.get('csv') == fingerprint_csv(caminho_csv)
+
+
+def _preparar_para_parquet(df):
+    # Colunas texto com tipos misturados não são aceitas pelo Arrow: vira tudo texto, preservando NaN.
+    saida = df.copy()
+    for coluna in saida.columns[saida.dtypes == object]:
+        tipos = saida[coluna].dropna().map(type).unique()
+        if len(tipos) > 1:
+            saida[coluna] = saida[coluna].where(saida[coluna].isna(), saida[coluna].astype(str))
+    return saida
+
+
+def gerar_snapshot(caminho_csv=CAMINHO_CSV, caminho_snapshot=CAMINHO_SNAPSHOT, df=None):
+    """
+    Converte o CSV em Parquet, com o registro (hash do CSV, schema, manifesto
+    e versão do formato) nos metadados do próprio arquivo. Retorna o registro.
+    """
+    if not PYARROW_DISPONIVEL:
+        raise RuntimeError('pyarrow não está instalado; não é possível gerar o snapshot Parquet.')
+    if df is None:
+        df = ler_csv(caminho_csv)
+    tabela = pa.Table.from_pandas(_preparar_para_parquet(df), preserve_index=False)
+    registro = {
+        'csv': fingerprint_csv(caminho_csv),
+        'schema': fingerprint_schema(tabela.schema),
+        'manifesto': assinatura_manifesto(),
+        'versao_formato': VERSAO_FORMATO,
+        'linhas': int(tabela.num_rows),
+        'colunas': int(tabela.num_columns),
+    }
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_METADADOS] = json.dumps(registro, ensure_ascii=False).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Nome temporário único: vários processos podem regravar ao mesmo tempo;
+    # cada um troca o arquivo inteiro de uma vez (dados e registro juntos).
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(os.path.abspath(caminho_snapshot)), suffix='.parquet.tmp', delete=False
+    ) as temporario:
+        caminho_temporario = temporario.name
+    try:
+        pq.write_table(tabela, caminho_temporario)
+        os.replace(caminho_temporario, caminho_snapshot)
+    except BaseException:
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+        raise
+    return registro
+
+
+def carregar_base_colunar(caminho_csv=CAMINHO_CSV, caminho_snapshot=CAMINHO_SNAPSHOT):
+    """
+    Lê o snapshot Parquet quando ele corresponde ao CSV atual; caso contrário lê
+    o CSV e tenta regravar o snapshot para as próximas partidas.
+    """
+    inicio = time.perf_counter()
+    if snapshot_valido(caminho_csv, caminho_snapshot):
+        colunas = [c for c in pq.read_schema(caminho_snapshot).names if manter_coluna(c)]
+        df = pd.read_parquet(caminho_snapshot, engine='pyarrow', columns=colunas)
+        # Arrow devolve nulos de texto como None; o restante do app espera NaN, como no read_csv.
+        colunas_texto = df.columns[df.dtypes == object]
+        df[colunas_texto] = df[colunas_texto].where(df[colunas_texto].notna(), np.nan)
+        logger.info('Base carregada do snapshot Parquet em %.2fs.', time.perf_counter() - inicio)
+        return df
+
+    df = ler_csv(caminho_csv)
+    logger.info('Base carregada do CSV em %.2fs.', time.perf_counter() - inicio)
+    if PYARROW_DISPONIVEL:
+        try:
+            gerar_snapshot(caminho_csv, caminho_snapshot, df=df)
+        except Exception:
+            logger.warning('Não foi possível gravar o snapshot Parquet.', exc_info=True)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera o snapshot Parquet da base_final.csv.')
+    parser.add_argument('--csv', default=CAMINHO_CSV)
+    parser.add_argument('--saida', default=CAMINHO_SNAPSHOT)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    registro = gerar_snapshot(args.csv, args.saida)
+    print(
+        f"Snapshot gravado em {args.saida}: {registro['linhas']} linhas, {registro['colunas']} colunas, "
+        f"schema {registro['schema'][:12]} ({time.perf_counter() - inicio:.1f}s)."
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Manifesto das colunas da base_final.csv que não são carregadas no app.
+
+A lista fica em `colunas_descartadas.txt`, um nome de coluna por linha, e é
+revisada à mão. Partiu de `_unused_cols.txt` e `_ident_cols.txt`, que estão
+desatualizadas: as páginas leem a maior parte daquelas colunas (opções de
+múltipla escolha buscadas por prefixo, ações estruturantes, dimensões do
+ecossistema...). Ficaram só identificação, metadados do formulário, campos
+"saiba mais" e textos abertos sem uso. `tests/test_manifesto_colunas.py`
+confere que nenhuma busca de coluna das páginas cai numa coluna descartada.
+"""
+import hashlib
+import os
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_DESCARTADAS = os.path.join(DIRETORIO_BASE, 'colunas_descartadas.txt')
+
+_descartadas_cache = None
+
+
+def _ler_lista(caminho):
+    with open(caminho, 'r', encoding='utf-8-sig') as arquivo:
+        # Sem strip(): há cabeçalhos com espaço no fim (ex.: "Produtos ").
+        return [linha for linha in arquivo.read().splitlines() if linha.strip()]
+
+
+def colunas_descartadas():
+    """Conjunto de nomes de colunas que não devem ser materializados."""
+    global _descartadas_cache
+    if _descartadas_cache is None:
+        _descartadas_cache = frozenset(_ler_lista(ARQUIVO_DESCARTADAS))
+    return _descartadas_cache
+
+
+def assinatura_manifesto():
+    """Hash do manifesto, usado para invalidar snapshots gerados com outro recorte."""
+    conteudo = '\x1f'.join(sorted(colunas_descartadas()))
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+
+
+def manter_coluna(coluna):
+    return str(coluna) not in colunas_descartadas()
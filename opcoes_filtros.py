@@ -0,0 +1,155 @@
+import bisect
+
+import streamlit as st
+
+from catalogo_colunas import normalizar_coluna
+from config import FAIXAS_RECEITA, ORDEM_FAIXA_POPULACIONAL
+from indice_filtros import obter_indice_filtros
+from utils import ACOES_ESTRUTURANTES, base_compartilhada
+
+PERGUNTA_ACAO = (
+    '10. As atividades do Ponto de Cultura estão relacionadas diretamente '
+    'com quais ações estruturante da Política Nacional de Cultura Viva?'
+)
+# Linguagens com menos registros que isso não viram opção de filtro.
+MIN_REGISTROS_LINGUAGEM = 10
+# Municípios enviados ao widget por busca (além dos já selecionados).
+LIMITE_SUGESTOES_MUNICIPIO = 50
+
+
+def rotulo_acao(coluna):
+    texto = str(coluna)
+    if '(' in texto and ')' in texto:
+        return texto.split('(', 1)[1].rsplit(')', 1)[0].strip()
+    return texto.replace(PERGUNTA_ACAO, '').strip(' -')
+
+
+def _agrupar_ordenado(df, chave, valor):
+    pares = df[[chave, valor]].dropna().drop_duplicates()
+    return {k: sorted(grupo[valor].tolist()) for k, grupo in pares.groupby(chave, observed=True)}
+
+
+class IndiceMunicipios:
+    """
+    Busca de municípios por prefixo, sem acento e sem caixa. Cada nome entra
+    nas chaves ordenadas uma vez por palavra (a partir dela até o fim), então
+    "paulo" encontra "São Paulo". Nomes que começam com o termo vêm primeiro,
+    depois os de mais registros.
+    """
+
+    def __init__(self, municipios, contagens=None):
+        self.contagens = dict(contagens or {})
+        entradas = []
+        for cidade in municipios:
+            palavras = normalizar_coluna(cidade).split()
+            for i in range(len(palavras)):
+                entradas.append((' '.join(palavras[i:]), i, cidade))
+        entradas.sort()
+        self._chaves = [chave for chave, _, _ in entradas]
+        self._entradas = [(i, cidade) for _, i, cidade in entradas]
+        self._mais_frequentes = sorted(municipios, key=lambda c: (-self.contagens.get(c, 0), c))
+
+    def _ordem(self, cidade, palavra):
+        return (palavra > 0, -self.contagens.get(cidade, 0), cidade)
+
+    def buscar(self, termo, limite=LIMITE_SUGESTOES_MUNICIPIO, permitidos=None):
+        termo_n = normalizar_coluna(termo)
+        if not termo_n:
+            candidatos = (c for c in self._mais_frequentes if permitidos is None or c in permitidos)
+            return [c for _, c in zip(range(limite), candidatos)]
+
+        melhores = {}
+        inicio = bisect.bisect_left(self._chaves, termo_n)
+        for pos in range(inicio, len(self._chaves)):
+            if not self._chaves[pos].startswith(termo_n):
+                break
+            palavra, cidade = self._entradas[pos]
+            if permitidos is not None and cidade not in permitidos:
+                continue
+            ordem = self._ordem(cidade, palavra)
+            if cidade not in melhores or ordem < melhores[cidade]:
+                melhores[cidade] = ordem
+        return sorted(melhores, key=melhores.get)[:limite]
+
+
+class OpcoesFiltros:
+    """
+    Opções de cada filtro do painel, calculadas uma vez por versão da base:
+    listas ordenadas, contagem de linguagens, colunas de ação estruturante e
+    os índices estado -> municípios e região -> estados.
+    """
+
+    def __init__(self, df, contagem_linguagens=None):
+        self.index = df.index
+        self.estados = sorted(df['estado'].dropna().unique())
+        self.regioes = sorted(df['regiao'].dropna().unique())
+        self.municipios = sorted(df['cidade'].dropna().unique())
+        self.tipos = sorted(df['tipo_ponto'].dropna().unique())
+        self.registros = sorted(df['registro'].dropna().unique())
+        presentes = set(df['faixa_populacional'].dropna().unique())
+        self.faixas_populacionais = [f for f in ORDEM_FAIXA_POPULACIONAL if f in presentes]
+
+        if contagem_linguagens is None and 'linguagens_lista' in df.columns:
+            contagem_linguagens = df['linguagens_lista'].explode().value_counts()
+        if contagem_linguagens is not None:
+            self.linguagens = sorted(contagem_linguagens[contagem_linguagens >= MIN_REGISTROS_LINGUAGEM].index.tolist())
+        else:
+            self.linguagens = []
+
+        self.colunas_acao = []
+        for coluna in df.columns:
+            texto = str(coluna)
+            if texto in ACOES_ESTRUTURANTES or 'ações estruturante' in texto or 'acoes estruturante' in texto:
+                if texto.strip() == PERGUNTA_ACAO:
+                    continue
+                self.colunas_acao.append(coluna)
+        self.coluna_por_rotulo_acao = {}
+        for coluna in self.colunas_acao:
+            rotulo = rotulo_acao(coluna)
+            if rotulo and rotulo not in self.coluna_por_rotulo_acao:
+                self.coluna_por_rotulo_acao[rotulo] = coluna
+
+        self.cidades_por_estado = _agrupar_ordenado(df, 'estado', 'cidade')
+        self.busca_municipios = IndiceMunicipios(self.municipios, df['cidade'].value_counts().to_dict())
+
+    def cidades_de(self, estados):
+        """Municípios (ordenados) dos estados informados; sem estados, todos."""
+        if not estados:
+            return self.municipios
+        return sorted({cidade for estado in estados for cidade in self.cidades_por_estado.get(estado, [])})
+
+    def sugerir_municipios(self, termo, estados=None, selecionados=None):
+        """Opções do widget de município: as já selecionadas mais as melhores da busca."""
+        permitidos = set(self.cidades_de(estados)) if estados else None
+        encontrados = self.busca_municipios.buscar(termo, permitidos=permitidos)
+        selecionados = list(selecionados or [])
+        return selecionados + [c for c in encontrados if c not in selecionados]
+
+    def catalogo_llm(self):
+        """Valores permitidos de cada campo para o assistente de filtros por texto."""
+        return {
+            'estado': self.estados,
+            'regiao': self.regioes,
+            'municipio': self.municipios,
+            'faixa_populacional': self.faixas_populacionais,
+            'acoes_estruturantes': list(self.coluna_por_rotulo_acao),
+            'linguagem_artistica': self.linguagens,
+            'faixa_receita': FAIXAS_RECEITA,
+            'tipo_ponto': self.tipos,
+            'registro': self.registros,
+            'filtros_booleanos': ['Sim', 'Não'],
+            'municipios_por_estado': self.cidades_por_estado,
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def obter_opcoes_filtros(versao_cache='v2'):
+    indice = obter_indice_filtros(versao_cache)
+    return OpcoesFiltros(base_compartilhada(versao_cache), indice.linguagens.contagens())
+
+
+def opcoes_para(df):
+    """Catálogo em cache quando `df` é a base compartilhada; senão, calculado para `df`."""
+    if obter_indice_filtros().cobre(df):
+        return obter_opcoes_filtros()
+    return OpcoesFiltros(df)
@@ -3,23 +3,25 @@ import sys
 
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from components import (
+    fragmento,
     grafico_barras_series,
     grafico_donut,
+    mapa_em_png,
     mapa_estados_matplotlib,
-    mapa_municipios_matplotlib,
+    mapa_municipios_png,
     mapa_regioes_matplotlib,
     mostrar_grafico,
+    png_em_cache,
 )
 from config import PALETA_CORES
-from relatorio_pagina import definir_aba_relatorio, registrar_figura_matplotlib
-from utils import aplicar_filtros, encontrar_coluna, preparar_base
+from relatorio_pagina import definir_aba_relatorio, registrar_imagem_png
+from utils import encontrar_coluna, hash_conteudo, obter_base_filtrada
 
 st.title("A) Identificação")
 definir_aba_relatorio("Visão geral")
@@ -30,9 +32,7 @@ Esta página apresenta o perfil institucional e territorial da Rede Cultura Viva
 """
 )
 
-_df = preparar_base()
-if 'filtros_globais' in st.session_state:
-    _df = aplicar_filtros(_df, st.session_state['filtros_globais'])
+_df = obter_base_filtrada()
 
 
 def _serie_texto_normalizado(serie):
@@ -141,6 +141,62 @@ def _aplicar_layout_donut_identificacao(fig):
     return fig
 
 
+@fragmento('mapa_identificacao')
+def _secao_mapa(df, opcoes_visao, chave_visao):
+    # Trocar a visão do mapa reexecuta só este bloco.
+    visao = st.session_state[chave_visao]
+    if visao == 'Por Estado':
+        tabela_mapa = _contagem_estado_para_mapa(df)
+        gerar_mapa = mapa_estados_matplotlib
+        titulo_mapa_relatorio = "Distribuição dos Pontos de Cultura por Estado"
+    elif visao == 'Por Região':
+        tabela_mapa = df['regiao'].value_counts().reset_index()
+        tabela_mapa.columns = ['regiao', 'contagem']
+        gerar_mapa = mapa_regioes_matplotlib
+        titulo_mapa_relatorio = "Distribuição dos Pontos de Cultura por Região"
+    else:
+        col_cidade_mapa = 'cidade_api' if 'cidade_api' in df.columns else 'cidade'
+        if 'uf_api' in df.columns:
+            tabela_mapa = (
+                df[[col_cidade_mapa, 'uf_api']]
+                .dropna(subset=[col_cidade_mapa, 'uf_api'])
+                .groupby([col_cidade_mapa, 'uf_api'])
+                .size()
+                .reset_index(name='contagem')
+            )
+            tabela_mapa.columns = ['cidade', 'uf', 'contagem']
+        else:
+            tabela_mapa = df[col_cidade_mapa].value_counts().reset_index()
+            tabela_mapa.columns = ['cidade', 'contagem']
+        titulo_mapa_relatorio = "Pontos de Cultura por Município"
+
+    if visao == 'Por Estado' and tabela_mapa.empty:
+        st.info('Sem UFs válidas para renderizar o mapa estadual.')
+    else:
+        definir_aba_relatorio(f"Mapa - {visao}")
+        # O mapa é função apenas da visão e da tabela de contagens: usa isso como chave do PNG,
+        # compartilhado entre sessões (a base sem filtros sai sempre do cache).
+        chave_mapa = hash_conteudo(visao, pd.util.hash_pandas_object(tabela_mapa, index=False).values.tobytes())
+        png_mapa = None
+        with st.spinner('Montando mapa...', show_time=True):
+            if visao == 'Por Município':
+                try:
+                    png_mapa = png_em_cache(chave_mapa, lambda: mapa_municipios_png(tabela_mapa))
+                except FileNotFoundError:
+                    st.info('Malha municipal indisponível no momento; use a visão por estado ou por região.')
+            else:
+                png_mapa = mapa_em_png(chave_mapa, lambda: gerar_mapa(tabela_mapa))
+        if png_mapa is not None:
+            registrar_imagem_png(png_mapa, titulo_mapa_relatorio)
+            st.image(png_mapa, use_container_width=True)
+    st.radio(
+        'Visualização territorial do mapa',
+        opcoes_visao,
+        key=chave_visao,
+        horizontal=True,
+        label_visibility='collapsed',
+    )
+
 
 if _df.empty:
     st.warning('Sem dados para os filtros selecionados.')
@@ -152,55 +208,10 @@ else:
         visao_inicial = st.session_state.get('visao_territorial', opcoes_visao[0])
         st.session_state[chave_visao] = visao_inicial if visao_inicial in opcoes_visao else opcoes_visao[0]
 
-    visao = st.session_state[chave_visao]
-
     col_mapa, col_lateral = st.columns([1.6, 1.4])
 
     with col_mapa:
-        with st.spinner('Montando mapa...', show_time=True):
-            if visao == 'Por Estado':
-                contagem_estado = _contagem_estado_para_mapa(_df)
-                if contagem_estado.empty:
-                    fig_mapa = None
-                    titulo_mapa_relatorio = "Distribuição dos Pontos de Cultura por Estado"
-                else:
-                    fig_mapa = mapa_estados_matplotlib(contagem_estado)
-                    titulo_mapa_relatorio = "Distribuição dos Pontos de Cultura por Estado"
-            elif visao == 'Por Região':
-                contagem_regiao = _df['regiao'].value_counts().reset_index()
-                contagem_regiao.columns = ['regiao', 'contagem']
-                fig_mapa = mapa_regioes_matplotlib(contagem_regiao)
-                titulo_mapa_relatorio = "Distribuição dos Pontos de Cultura por Região"
-            else:
-                col_cidade_mapa = 'cidade_api' if 'cidade_api' in _df.columns else 'cidade'
-                if 'uf_api' in _df.columns:
-                    contagem_cidades = (
-                        _df[[col_cidade_mapa, 'uf_api']]
-                        .dropna(subset=[col_cidade_mapa, 'uf_api'])
-                        .groupby([col_cidade_mapa, 'uf_api'])
-                        .size()
-                        .reset_index(name='contagem')
-                    )
-                    contagem_cidades.columns = ['cidade', 'uf', 'contagem']
-                else:
-                    contagem_cidades = _df[col_cidade_mapa].value_counts().reset_index()
-                    contagem_cidades.columns = ['cidade', 'contagem']
-                fig_mapa = mapa_municipios_matplotlib(contagem_cidades)
-                titulo_mapa_relatorio = "Pontos de Cultura por Município"
-        if fig_mapa is None:
-            st.info('Sem UFs válidas para renderizar o mapa estadual.')
-        else:
-            definir_aba_relatorio(f"Mapa - {visao}")
-            registrar_figura_matplotlib(fig_mapa, titulo_mapa_relatorio)
-            st.pyplot(fig_mapa, use_container_width=True)
-            plt.close(fig_mapa)
-        st.radio(
-            'Visualização territorial do mapa',
-            opcoes_visao,
-            key=chave_visao,
-            horizontal=True,
-            label_visibility='collapsed',
-        )
+        _secao_mapa(_df, opcoes_visao, chave_visao)
 
     with col_lateral:
         p1, p2 = st.columns(2)
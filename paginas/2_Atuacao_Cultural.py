@@ -7,9 +7,10 @@ import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from utils import preparar_base, aplicar_filtros, para_bool, ACOES_ESTRUTURANTES, encontrar_coluna
-from components import mostrar_grafico, grafico_barras_series, grafico_donut
+from utils import para_bool, ACOES_ESTRUTURANTES, encontrar_coluna, obter_base_filtrada
+from components import fragmento, mostrar_grafico, grafico_barras_series, grafico_donut, renderizar_abas
 from config import PALETA_CORES, FONTE_FAMILIA, FONTE_TAMANHOS
+from questoes_multipla_escolha import contar_alguma_opcao, contar_opcoes
 from relatorio_pagina import definir_aba_relatorio
 
 st.title("B) Atuação Cultural")
@@ -20,18 +21,10 @@ Esta página analisa como os Pontos e Pontões atuam no território e no ecossis
 """
 )
 
-df = preparar_base()
-if 'filtros_globais' in st.session_state:
-    df = aplicar_filtros(df, st.session_state['filtros_globais'])
+df = obter_base_filtrada()
 
-# Abas
-tab1, tab2, tab3 = st.tabs([
-    "Abrangência Territorial e Ações Estruturantes",
-    "Linguagens Artísticas e Ecossistema",
-    "Detalhamento por Linguagem Artística"
-])
 
-with tab1:
+def _renderizar_tab1():
     definir_aba_relatorio("Abrangência Territorial e Ações Estruturantes")
     def grafico_abrangencia_empilhado(filtrado):
         dicionario = {
@@ -185,7 +178,8 @@ with tab1:
         else:
             st.info("Sem dados de ações estruturantes.")
 
-with tab2:
+
+def _renderizar_tab2():
     definir_aba_relatorio("Linguagens Artísticas e Ecossistema")
     c1, c2 = st.columns([2, 3])
 
@@ -282,7 +276,8 @@ with tab2:
         else:
             st.info("Dimensões do ecossistema cultural não encontradas na base.")
 
-with tab3:
+
+def _renderizar_tab3():
     definir_aba_relatorio("Detalhamento por Linguagem Artística")
     DICIONARIO_MICRO = {
         'Artes visuais (Pintura)': 'Pintura',
@@ -355,7 +350,12 @@ with tab3:
         'Hip Hop (Outras:)': 'Outras expressões da cultura Hip Hop'
     }
 
-    dados_micro = df.rename(columns=DICIONARIO_MICRO)
+    # Colunas originais por rótulo micro: as contagens saem do registro de múltipla escolha.
+    coluna_por_rotulo = {rotulo: coluna for coluna, rotulo in DICIONARIO_MICRO.items()}
+
+    def _colunas_micro(rotulos):
+        return [coluna_por_rotulo.get(r, r) for r in rotulos if coluna_por_rotulo.get(r, r) in df.columns]
+
     grupos_micro = [
         ('Artes Visuais', ['Pintura', 'Escultura', 'Desenho', 'Gravura', 'Fotografia', 'Instalação', 'Arte digital', 'Artes gráficas', 'Arte urbana', 'Grafite', 'Perfomance', 'Outras expressões de arte visual']),
         ('Audiovisual', ['Cinema', 'Vídeo', 'Televisão', 'Animação', 'Mapping', 'Audiovisual expandido', 'Experimentações audiovisuais', 'Outras expressões audiovisuais']),
@@ -368,48 +368,57 @@ with tab3:
     ]
 
     contagens_macro = {}
-    total_registros = max(len(dados_micro), 1)
+    total_registros = max(len(df), 1)
     for titulo, colunas in grupos_micro:
-        colunas_validas = [c for c in colunas if c in dados_micro.columns]
+        colunas_validas = _colunas_micro(colunas)
         if colunas_validas:
-            base = pd.concat([para_bool(dados_micro[c]) for c in colunas_validas], axis=1)
-            contagens_macro[titulo] = int(base.any(axis=1).sum())
-
-    opcoes = [t for t, _ in grupos_micro if t in contagens_macro]
-    if opcoes:
-        col_controle, col_grafico = st.columns([1, 6], gap='small')
-
-        with col_controle:
-            escolha = st.radio(
-                'Linguagem',
-                opcoes,
-                index=0,
-                key='b_tab3_linguagem_micro_radio'
-            )
-
-        with col_grafico:
-            colunas = dict(grupos_micro).get(escolha, [])
-            colunas_validas = [c for c in colunas if c in dados_micro.columns]
-            if colunas_validas:
-                contagens = {c: int(para_bool(dados_micro[c]).sum()) for c in colunas_validas}
-                serie = pd.Series(contagens).sort_values(ascending=True)
-                fig_micro = grafico_barras_series(
-                    serie,
-                    f'Visão micro: {escolha}',
-                    cor=PALETA_CORES['principais'][2],
-                    horizontal=True,
-                    altura=520,
-                    mostrar_percentual=False
+            contagens_macro[titulo] = contar_alguma_opcao(df, colunas_validas)
+
+    @fragmento('detalhamento_linguagem')
+    def _detalhamento_micro():
+        # A escolha da linguagem reexecuta só o gráfico de detalhamento.
+        opcoes = [t for t, _ in grupos_micro if t in contagens_macro]
+        if opcoes:
+            col_controle, col_grafico = st.columns([1, 6], gap='small')
+
+            with col_controle:
+                escolha = st.radio(
+                    'Linguagem',
+                    opcoes,
+                    index=0,
+                    key='b_tab3_linguagem_micro_radio'
                 )
-                textos = [f'{v} ({(v / total_registros):.1%})' for v in serie.tolist()]
-                fig_micro.update_traces(text=textos, textposition='outside', cliponaxis=False)
-                mostrar_grafico(fig_micro, f'Visão micro: {escolha}')
-            else:
-                st.info('Sem dados para a linguagem selecionada.')
-    else:
-        st.info('Sem dados suficientes para o detalhamento micro.')
-
 
+            with col_grafico:
+                rotulos = [r for r in dict(grupos_micro).get(escolha, []) if coluna_por_rotulo.get(r, r) in df.columns]
+                if rotulos:
+                    contagens_colunas = contar_opcoes(df, _colunas_micro(rotulos))
+                    contagens = {r: contagens_colunas[coluna_por_rotulo.get(r, r)] for r in rotulos}
+                    serie = pd.Series(contagens).sort_values(ascending=True)
+                    fig_micro = grafico_barras_series(
+                        serie,
+                        f'Visão micro: {escolha}',
+                        cor=PALETA_CORES['principais'][2],
+                        horizontal=True,
+                        altura=520,
+                        mostrar_percentual=False
+                    )
+                    textos = [f'{v} ({(v / total_registros):.1%})' for v in serie.tolist()]
+                    fig_micro.update_traces(text=textos, textposition='outside', cliponaxis=False)
+                    mostrar_grafico(fig_micro, f'Visão micro: {escolha}')
+                else:
+                    st.info('Sem dados para a linguagem selecionada.')
+        else:
+            st.info('Sem dados suficientes para o detalhamento micro.')
 
+    _detalhamento_micro()
 
 
+renderizar_abas(
+    'abas_atuacao_cultural',
+    [
+        ('Abrangência Territorial e Ações Estruturantes', _renderizar_tab1),
+        ('Linguagens Artísticas e Ecossistema', _renderizar_tab2),
+        ('Detalhamento por Linguagem Artística', _renderizar_tab3),
+    ],
+)
@@ -8,10 +8,12 @@ import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
+from catalogo_colunas import obter_catalogo
 from config import FAIXAS_RECEITA, FONTE_FAMILIA, FONTE_TAMANHOS, PALETA_CORES
-from components import grafico_barras_series, grafico_donut, mostrar_grafico
+from components import grafico_barras_series, grafico_donut, mostrar_grafico, renderizar_abas
+from questoes_multipla_escolha import serie_opcoes
 from relatorio_pagina import definir_aba_relatorio
-from utils import aplicar_filtros, encontrar_coluna, normalizar_texto, para_bool, preparar_base
+from utils import encontrar_coluna, normalizar_texto, obter_base_filtrada, para_bool
 
 
 def _aplicar_padrao_donut_pagina_a(fig):
@@ -114,16 +116,9 @@ def _contar_colunas_booleanas(df, mapeamento):
 
 def _q16_dificuldades(df):
   prefixo = normalizar_texto("16. Identifique até três principais dificuldades")
-  colunas = [c for c in df.columns if normalizar_texto(c).startswith(prefixo)]
-  contagens = {}
-
-  for coluna in colunas:
-    if "(" not in coluna or ")" not in coluna:
-      continue
-    rotulo = coluna.split("(", 1)[1].rsplit(")", 1)[0].strip()
-    contagens[rotulo] = int(para_bool(df[coluna]).sum())
-
-  return pd.Series(contagens, dtype="int64")
+  colunas = obter_catalogo(df.columns, normalizar_texto).todas_por_prefixo(prefixo)
+  colunas = [c for c in colunas if "(" in c and ")" in c]
+  return serie_opcoes(df, colunas)
 
 
 def _q18_motivos_nao_credito(df):
@@ -177,18 +172,10 @@ st.markdown(
   "Esta página reúne a dimensão de sustentabilidade econômica da rede, relacionando dependência de renda, acesso a recursos públicos e privados, crédito e principais barreiras financeiras. A análise permite distinguir onde o fomento está mais presente e onde persistem gargalos de financiamento, formalização e capacidade de captação. O uso combinado dos painéis facilita priorizar estratégias de apoio econômico e desenho de políticas de fomento. Nesta seção, você verá conteúdos associados às questões Q13 a Q19 do formulário."
 )
 
-df = preparar_base()
-if "filtros_globais" in st.session_state:
-  df = aplicar_filtros(df, st.session_state["filtros_globais"])
+df = obter_base_filtrada()
 
-tab_economia, tab_dificuldades = st.tabs(
-  [
-    "Economia do Ponto de Cultura",
-    "Dificuldades e estratégias financeiras dos Pontos de Cultura",
-  ]
-)
 
-with tab_economia:
+def _renderizar_tab_economia():
   definir_aba_relatorio("Economia do Ponto de Cultura")
   col_q13 = encontrar_coluna(
     df.columns,
@@ -372,7 +359,8 @@ with tab_economia:
     else:
       st.info("Sem dados detalhados de instrumentos públicos na amostra filtrada.")
 
-with tab_dificuldades:
+
+def _renderizar_tab_dificuldades():
   definir_aba_relatorio("Dificuldades e estratégias financeiras dos Pontos de Cultura")
   col_q17 = encontrar_coluna(
     df.columns,
@@ -522,9 +510,10 @@ with tab_dificuldades:
       st.info("Sem dados de motivos da Q18.2 na amostra filtrada.")
 
 
-
-
-
-
-
-
+renderizar_abas(
+  'abas_acesso_recursos',
+  [
+    ('Economia do Ponto de Cultura', _renderizar_tab_economia),
+    ('Dificuldades e estratégias financeiras dos Pontos de Cultura', _renderizar_tab_dificuldades),
+  ],
+)
@@ -9,11 +9,13 @@ import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from components import grafico_barras_series, grafico_donut, mostrar_grafico
+from catalogo_colunas import obter_catalogo
+from components import grafico_barras_series, grafico_donut, mostrar_grafico, renderizar_abas
 from config import CORES_GRAFICOS, FONTE_FAMILIA, FONTE_TAMANHOS, PALETA_CORES
+from questoes_multipla_escolha import contar_opcoes, rotulo_opcao, serie_opcoes
 from relatorio_pagina import definir_aba_relatorio, registrar_imagem_array
 from texto_wordcloud import gerar_wordcloud
-from utils import aplicar_filtros, para_bool, preparar_base
+from utils import obter_base_filtrada, para_bool
 
 
 DICIONARIO_PRODUTOS_SERVICOS = {
@@ -160,31 +162,15 @@ def _norm_local(txt):
 
 
 def _encontrar_coluna_local(colunas, alvo):
-    alvo_n = _norm_local(alvo)
-    for c in colunas:
-        if _norm_local(c) == alvo_n:
-            return c
-    for c in colunas:
-        if alvo_n in _norm_local(c):
-            return c
-    return None
+    return obter_catalogo(colunas).encontrar(alvo)
 
 
 def _encontrar_por_prefixo(colunas, prefixos_norm):
-    for c in colunas:
-        cn = _norm_local(c)
-        if any(cn.startswith(p) for p in prefixos_norm):
-            return c
-    return None
+    return obter_catalogo(colunas).por_prefixo(prefixos_norm)
 
 
 def _find_col_tokens(colunas, *tokens):
-    tokens_norm = [_norm_local(t) for t in tokens]
-    for coluna in colunas:
-        cn = _norm_local(coluna)
-        if all(tok in cn for tok in tokens_norm):
-            return coluna
-    return None
+    return obter_catalogo(colunas).por_trechos(*tokens)
 
 
 def _serie_sim_nao(df, coluna):
@@ -266,16 +252,11 @@ def _serie_q20_predominancia(df):
 
 
 def _serie_multiselect_por_prefixo(df, prefixo_normalizado):
-    dados = {}
-    for col in df.columns:
-        col_norm = _norm_local(col)
-        if not col_norm.startswith(prefixo_normalizado):
-            continue
-        if "(" not in str(col) or ")" not in str(col):
-            continue
-        rotulo = str(col).split("(", 1)[1].rsplit(")", 1)[0].strip()
-        dados[rotulo] = int(para_bool(df[col]).sum())
-    return pd.Series(dados, dtype="int64")
+    colunas = [
+        col for col in obter_catalogo(df.columns).todas_por_prefixo(prefixo_normalizado)
+        if "(" in str(col) and ")" in str(col)
+    ]
+    return serie_opcoes(df, colunas)
 
 
 def _serie_produtos(df):
@@ -287,9 +268,10 @@ def _serie_produtos(df):
         col = _encontrar_coluna_local(df.columns, texto_coluna)
         rotulo_para_coluna[rotulo] = col
 
+    contagens = contar_opcoes(df, [c for c in rotulo_para_coluna.values() if c])
     for rotulo in LISTA_PRODUTOS:
         col = rotulo_para_coluna.get(rotulo)
-        dados[rotulo] = int(para_bool(df[col]).sum()) if col else 0
+        dados[rotulo] = contagens.get(col, 0) if col else 0
 
     return pd.Series(dados, dtype="int64")
 
@@ -303,9 +285,10 @@ def _serie_servicos(df):
         col = _encontrar_coluna_local(df.columns, texto_coluna)
         rotulo_para_coluna[rotulo] = col
 
+    contagens = contar_opcoes(df, [c for c in rotulo_para_coluna.values() if c])
     for rotulo in LISTA_SERVICOS:
         col = rotulo_para_coluna.get(rotulo)
-        dados[rotulo] = int(para_bool(df[col]).sum()) if col else 0
+        dados[rotulo] = contagens.get(col, 0) if col else 0
 
     return pd.Series(dados, dtype="int64")
 
@@ -352,12 +335,7 @@ def _colunas_q23(df):
     prefixo = _norm_local(
         "23. Identifique até três principais dificuldades do Ponto de Cultura para acessar mercados/comercializar produtos e/ou serviços?"
     )
-    cols = []
-    for c in df.columns:
-        cn = _norm_local(c)
-        if cn.startswith(prefixo) and "(" in str(c) and ")" in str(c):
-            cols.append(c)
-    return cols
+    return [c for c in obter_catalogo(df.columns).todas_por_prefixo(prefixo) if "(" in str(c) and ")" in str(c)]
 
 
 def _fig_q23_por_q22(df, col_q22):
@@ -373,11 +351,14 @@ def _fig_q23_por_q22(df, col_q22):
     if n_sim == 0 and n_nao == 0:
         return None
 
+    contagens_sim = contar_opcoes(base_sim, colunas_q23) if n_sim > 0 else {}
+    contagens_nao = contar_opcoes(base_nao, colunas_q23) if n_nao > 0 else {}
+
     registros = []
     for col in colunas_q23:
-        rotulo = str(col).split("(", 1)[1].rsplit(")", 1)[0].strip()
-        c_sim = int(para_bool(base_sim[col]).sum()) if n_sim > 0 else 0
-        c_nao = int(para_bool(base_nao[col]).sum()) if n_nao > 0 else 0
+        rotulo = rotulo_opcao(col)
+        c_sim = contagens_sim.get(col, 0)
+        c_nao = contagens_nao.get(col, 0)
         registros.append({"Dificuldade": rotulo, "Grupo": "Com relação (Sim)", "Contagem": c_sim, "Base": n_sim})
         registros.append({"Dificuldade": rotulo, "Grupo": "Sem relação (Não)", "Contagem": c_nao, "Base": n_nao})
 
@@ -471,18 +452,10 @@ st.markdown(
     "Esta página examina a dinâmica de comercialização dos Pontos e Pontões, incluindo modelo de acesso às ações, tipos de produtos e serviços, estratégias de mercado e dificuldades para vender e circular. Os gráficos evidenciam como a economia cultural se organiza entre práticas presenciais, redes de circulação e tentativas de inserção em mercados mais amplos. O objetivo é apoiar decisões sobre fortalecimento comercial, diversificação de receitas e redução de barreiras de mercado. Nesta seção, você verá conteúdos associados às questões Q20 a Q24 do formulário."
 )
 
-df = preparar_base()
-if "filtros_globais" in st.session_state:
-    df = aplicar_filtros(df, st.session_state["filtros_globais"])
+df = obter_base_filtrada()
 
-tab1, tab2 = st.tabs(
-    [
-        "Comercialização de produtos e serviços",
-        "Dificuldades e estratégias de acesso a mercados",
-    ]
-)
 
-with tab1:
+def _renderizar_tab1():
     definir_aba_relatorio("Comercialização de produtos e serviços")
     col_q21 = _encontrar_por_prefixo(
         df.columns,
@@ -608,7 +581,8 @@ with tab1:
         else:
             st.info("Sem dados de serviços comercializados na amostra filtrada.")
 
-with tab2:
+
+def _renderizar_tab2():
     definir_aba_relatorio("Dificuldades e estratégias de acesso a mercados")
     col_q22 = _encontrar_por_prefixo(
         df.columns,
@@ -708,10 +682,10 @@ with tab2:
             st.info("Sem dados textuais de Q24.1 na amostra filtrada.")
 
 
-
-
-
-
-
-
-
+renderizar_abas(
+    'abas_acesso_mercados',
+    [
+        ('Comercialização de produtos e serviços', _renderizar_tab1),
+        ('Dificuldades e estratégias de acesso a mercados', _renderizar_tab2),
+    ],
+)
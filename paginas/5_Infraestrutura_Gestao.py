@@ -9,11 +9,13 @@ import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from components import grafico_barras_series, grafico_donut, mostrar_grafico
+from catalogo_colunas import obter_catalogo
+from components import grafico_barras_series, grafico_donut, mostrar_grafico, renderizar_abas
 from config import FONTE_FAMILIA, FONTE_TAMANHOS, PALETA_CORES
+from questoes_multipla_escolha import contar_opcoes
 from relatorio_pagina import definir_aba_relatorio, registrar_imagem_array
 from texto_wordcloud import gerar_wordcloud
-from utils import aplicar_filtros, para_bool, preparar_base
+from utils import obter_base_filtrada, para_bool
 
 
 def _norm_local(texto):
@@ -25,14 +27,7 @@ def _norm_local(texto):
 
 
 def _encontrar_coluna_local(colunas, alvo):
-    alvo_n = _norm_local(alvo)
-    for coluna in colunas:
-        if _norm_local(coluna) == alvo_n:
-            return coluna
-    for coluna in colunas:
-        if alvo_n in _norm_local(coluna):
-            return coluna
-    return None
+    return obter_catalogo(colunas).encontrar(alvo)
 
 
 def _rotulo_parenteses(coluna):
@@ -47,18 +42,17 @@ def _serie_multiescolha_por_prefixo(df, prefixo, excluir_rotulos=None):
     dados = {}
     prefixo_n = _norm_local(prefixo)
 
-    for coluna in df.columns:
-        coluna_n = _norm_local(coluna)
-        if not coluna_n.startswith(prefixo_n):
-            continue
-        if "(" not in str(coluna) or ")" not in str(coluna):
-            continue
-
+    colunas = [
+        coluna for coluna in obter_catalogo(df.columns).todas_por_prefixo(prefixo_n)
+        if "(" in str(coluna) and ")" in str(coluna)
+    ]
+    contagens = contar_opcoes(df, colunas)
+    for coluna in colunas:
         rotulo = _rotulo_parenteses(coluna).replace("ﬁ", "fi").replace("oﬁ", "ofi")
         if _norm_local(rotulo) in excluir:
             continue
 
-        dados[rotulo] = int(para_bool(df[coluna]).sum())
+        dados[rotulo] = contagens[coluna]
 
     if not dados:
         return pd.Series(dtype="int64")
@@ -312,20 +306,10 @@ st.markdown(
     "Esta página consolida informações sobre infraestrutura, serviços ofertados à comunidade e práticas de gestão dos Pontos e Pontões. Condições materiais, capacidade organizativa e estratégias de gestão influenciam diretamente a continuidade, a qualidade e o alcance das ações culturais. A leitura integrada dos blocos permite identificar fortalezas operacionais, lacunas estruturais e oportunidades de qualificação da gestão. Nesta seção, você verá conteúdos associados às questões Q25 a Q33 do formulário."
 )
 
-base = preparar_base()
-if "filtros_globais" in st.session_state:
-    base = aplicar_filtros(base, st.session_state["filtros_globais"])
+base = obter_base_filtrada()
 
-aba1, aba2, aba3, aba4 = st.tabs(
-    [
-        "Infraestrutura",
-        "Serviços ofertados à comunidade",
-        "Gestão dos Pontos de Cultura",
-        "Estratégias comerciais",
-    ]
-)
 
-with aba1:
+def _renderizar_aba1():
     definir_aba_relatorio("Infraestrutura")
     col1, col2 = st.columns([4, 6])
 
@@ -368,7 +352,8 @@ with aba1:
             )
             mostrar_grafico(fig_q25, "Infraestruturas disponíveis para uso público/comunitário")
 
-with aba2:
+
+def _renderizar_aba2():
     definir_aba_relatorio("Serviços ofertados à comunidade")
     serie_q26 = _serie_multiescolha_por_prefixo(
         base,
@@ -403,7 +388,8 @@ with aba2:
             )
             mostrar_grafico(fig_q26, "Serviços prestados à comunidade")
 
-with aba3:
+
+def _renderizar_aba3():
     definir_aba_relatorio("Gestão dos Pontos de Cultura")
     l1, l2, l3 = st.columns(3)
 
@@ -488,7 +474,8 @@ with aba3:
             )
             mostrar_grafico(fig_q31, "Ferramentas e práticas de gestão financeira utilizadas")
 
-with aba4:
+
+def _renderizar_aba4():
     definir_aba_relatorio("Estratégias comerciais")
     b1, b2 = st.columns([2, 3])
 
@@ -531,6 +518,12 @@ with aba4:
             st.info("Sem dados textuais de Q33.1 na amostra filtrada.")
 
 
-
-
-
+renderizar_abas(
+    'abas_infraestrutura_gestao',
+    [
+        ('Infraestrutura', _renderizar_aba1),
+        ('Serviços ofertados à comunidade', _renderizar_aba2),
+        ('Gestão dos Pontos de Cultura', _renderizar_aba3),
+        ('Estratégias comerciais', _renderizar_aba4),
+    ],
+)
@@ -10,10 +10,12 @@ import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from components import grafico_barras_series, grafico_donut, mostrar_grafico
+from catalogo_colunas import obter_catalogo
+from components import grafico_barras_series, grafico_donut, mostrar_grafico, renderizar_abas
 from config import PALETA_CORES
+from questoes_multipla_escolha import contar_opcoes
 from relatorio_pagina import definir_aba_relatorio
-from utils import aplicar_filtros, para_bool, preparar_base
+from utils import obter_base_filtrada, para_bool
 
 
 def _norm_local(texto):
@@ -25,14 +27,7 @@ def _norm_local(texto):
 
 
 def _encontrar_coluna_local(colunas, alvo):
-    alvo_n = _norm_local(alvo)
-    for coluna in colunas:
-        if _norm_local(coluna) == alvo_n:
-            return coluna
-    for coluna in colunas:
-        if alvo_n in _norm_local(coluna):
-            return coluna
-    return None
+    return obter_catalogo(colunas).encontrar(alvo)
 
 
 def _rotulo_parenteses(coluna):
@@ -75,18 +70,17 @@ def _serie_multiescolha_por_prefixo(df, prefixo, excluir_rotulos=None):
     dados = {}
     prefixo_n = _norm_local(prefixo)
 
-    for coluna in df.columns:
-        coluna_n = _norm_local(coluna)
-        if not coluna_n.startswith(prefixo_n):
-            continue
-        if "(" not in str(coluna) or ")" not in str(coluna):
-            continue
-
+    colunas = [
+        coluna for coluna in obter_catalogo(df.columns).todas_por_prefixo(prefixo_n)
+        if "(" in str(coluna) and ")" in str(coluna)
+    ]
+    contagens = contar_opcoes(df, colunas)
+    for coluna in colunas:
         rotulo = _rotulo_parenteses(coluna)
         if _norm_local(rotulo) in excluir:
             continue
 
-        dados[rotulo] = int(para_bool(df[coluna]).sum())
+        dados[rotulo] = contagens[coluna]
 
     if not dados:
         return pd.Series(dtype="int64")
@@ -251,13 +245,10 @@ st.markdown(
     "Esta página aborda a articulação em rede como dimensão estratégica da Cultura Viva, observando participação social, vínculos institucionais e trocas de ofertas e demandas entre coletivos. Os gráficos mostram como redes e espaços de participação funcionam como infraestrutura política e colaborativa para sustentar ações no território. O painel apoia o mapeamento de conexões, cooperação e necessidades de fortalecimento da rede. Nesta seção, você verá conteúdos associados às questões Q34 a Q36 do formulário."
 )
 
-base = preparar_base()
-if "filtros_globais" in st.session_state:
-    base = aplicar_filtros(base, st.session_state["filtros_globais"])
+base = obter_base_filtrada()
 
-aba1, aba2 = st.tabs(["Participação social", "Compartilhamento em rede"])
 
-with aba1:
+def _renderizar_aba1():
     definir_aba_relatorio("Participação social")
     col_q34 = _encontrar_coluna_local(base.columns, "34. O Ponto de Cultura é integrado a algum espaço de participação social?")
     if not col_q34:
@@ -366,7 +357,8 @@ with aba1:
                 fig_m = _aplicar_percentual_base(fig_m, s_municipal, n_participa)
                 mostrar_grafico(fig_m, "Espaços de participação social - Esfera municipal")
 
-with aba2:
+
+def _renderizar_aba2():
     definir_aba_relatorio("Compartilhamento em rede")
     s_q35 = _serie_multiescolha_por_prefixo(
         base,
@@ -384,5 +376,10 @@ with aba2:
         mostrar_grafico(fig_gap, "Lacunas estratégicas entre oferta e demanda")
 
 
-
-
+renderizar_abas(
+    'abas_articulacao_rede',
+    [
+        ('Participação social', _renderizar_aba1),
+        ('Compartilhamento em rede', _renderizar_aba2),
+    ],
+)
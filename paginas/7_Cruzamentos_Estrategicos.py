@@ -9,10 +9,11 @@ import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from components import mostrar_grafico
+from catalogo_colunas import obter_catalogo
+from components import fragmento, mostrar_grafico
 from config import FAIXAS_RECEITA, PALETA_CORES
 from relatorio_pagina import definir_aba_relatorio
-from utils import aplicar_filtros, para_bool, preparar_base
+from utils import obter_base_filtrada, para_bool
 
 
 def _norm(texto):
@@ -24,14 +25,7 @@ def _norm(texto):
 
 
 def _find_col(colunas, alvo):
-    alvo_n = _norm(alvo)
-    for c in colunas:
-        if _norm(c) == alvo_n:
-            return c
-    for c in colunas:
-        if alvo_n in _norm(c):
-            return c
-    return None
+    return obter_catalogo(colunas).encontrar(alvo)
 
 
 def _serie_col(df, coluna):
@@ -51,9 +45,9 @@ def _serie_bool(df, coluna, nome_sim="Sim", nome_nao="Não"):
 
 def _serie_q20(df):
     col_raiz = None
-    for c in df.columns:
-        n = _norm(c)
-        if n.startswith("20. as acoes e atividades culturais realizadas pelo ponto de cultura sao predominantemente") and "(" not in str(c):
+    prefixo = "20. as acoes e atividades culturais realizadas pelo ponto de cultura sao predominantemente"
+    for c in obter_catalogo(df.columns).todas_por_prefixo(prefixo):
+        if "(" not in str(c):
             col_raiz = c
             break
     if not col_raiz:
@@ -123,9 +117,7 @@ st.markdown(
     "Esta página permite realizar cruzamentos bivariados para explorar relações entre território, perfil institucional e dimensões econômicas e culturais da amostra. Teste os três tipos de visualização: o heatmap funciona melhor para leitura rápida de concentração, as barras agrupadas ajudam a comparar contagens absolutas e as barras empilhadas 100% facilitam comparar proporções entre grupos. Combine variáveis e filtros, experimente alternativas e use os padrões encontrados para apoiar decisões e priorizar ações."
 )
 
-base = preparar_base()
-if "filtros_globais" in st.session_state:
-    base = aplicar_filtros(base, st.session_state["filtros_globais"])
+base = obter_base_filtrada()
 
 col_q30 = _find_col(base.columns, "30. Qual a porcentagem aproximada de pessoas que trabalham no Ponto de Cultura")
 col_q32 = _find_col(base.columns, "31. O Ponto de Cultura elaborou alguma Análise de Viabilidade Econômica?")
@@ -156,140 +148,144 @@ variaveis = {
     "Participação social": lambda df: _serie_col(df, col_q34),
 }
 
-opcoes = list(variaveis.keys())
-col_cfg, col_chart = st.columns([1, 3])
-
-with col_cfg:
-    tipo_visual = st.radio(
-        "Tipo de Visualização",
-        ["Heatmap", "Barras agrupadas", "Barras empilhadas 100%"],
-        index=2,
-    )
-    idx_var_linha = opcoes.index("Faixa de receita") if "Faixa de receita" in opcoes else 0
-    var_linha = st.selectbox("Variável 1 (linhas)", opcoes, index=idx_var_linha)
-    idx_var_coluna = opcoes.index("Acesso a recursos federais") if "Acesso a recursos federais" in opcoes else 1
-    var_coluna = st.selectbox(
-        "Variável 2 (colunas)",
-        opcoes,
-        index=idx_var_coluna,
-    )
-
-if var_linha == var_coluna:
-    with col_chart:
-        st.warning("Selecione duas variáveis diferentes para o cruzamento.")
-    st.stop()
+@fragmento("cruzamento")
+def _cruzamento(base):
+    # Trocar variáveis ou tipo de gráfico reexecuta só este bloco.
+    opcoes = list(variaveis.keys())
+    col_cfg, col_chart = st.columns([1, 3])
+
+    with col_cfg:
+        tipo_visual = st.radio(
+            "Tipo de Visualização",
+            ["Heatmap", "Barras agrupadas", "Barras empilhadas 100%"],
+            index=2,
+        )
+        idx_var_linha = opcoes.index("Faixa de receita") if "Faixa de receita" in opcoes else 0
+        var_linha = st.selectbox("Variável 1 (linhas)", opcoes, index=idx_var_linha)
+        idx_var_coluna = opcoes.index("Acesso a recursos federais") if "Acesso a recursos federais" in opcoes else 1
+        var_coluna = st.selectbox(
+            "Variável 2 (colunas)",
+            opcoes,
+            index=idx_var_coluna,
+        )
+
+    if var_linha == var_coluna:
+        with col_chart:
+            st.warning("Selecione duas variáveis diferentes para o cruzamento.")
+        return
 
-x = variaveis[var_linha](base)
-y = variaveis[var_coluna](base)
+    x = variaveis[var_linha](base)
+    y = variaveis[var_coluna](base)
 
-df_cross = pd.DataFrame({"linha": x, "coluna": y}).copy()
-df_cross["linha"] = df_cross["linha"].astype("object")
-df_cross["coluna"] = df_cross["coluna"].astype("object")
-df_cross = df_cross.dropna(subset=["linha", "coluna"])
-df_cross = df_cross[(df_cross["linha"].astype(str).str.strip() != "") & (df_cross["coluna"].astype(str).str.strip() != "")]
+    df_cross = pd.DataFrame({"linha": x, "coluna": y}).copy()
+    df_cross["linha"] = df_cross["linha"].astype("object")
+    df_cross["coluna"] = df_cross["coluna"].astype("object")
+    df_cross = df_cross.dropna(subset=["linha", "coluna"])
+    df_cross = df_cross[(df_cross["linha"].astype(str).str.strip() != "") & (df_cross["coluna"].astype(str).str.strip() != "")]
+
+    if df_cross.empty:
+        with col_chart:
+            st.info("Sem dados suficientes para esse cruzamento na amostra filtrada.")
+        return
+
+    ct_abs = pd.crosstab(df_cross["linha"], df_cross["coluna"])
+    ordem_linha = _reordenar_labels(ct_abs.index.tolist(), _ordem_referencia_variavel(var_linha))
+    ordem_coluna = _reordenar_labels(ct_abs.columns.tolist(), _ordem_referencia_variavel(var_coluna))
+    ct_abs = ct_abs.reindex(index=ordem_linha, columns=ordem_coluna)
+    total_cross = int(ct_abs.values.sum())
 
-if df_cross.empty:
     with col_chart:
-        st.info("Sem dados suficientes para esse cruzamento na amostra filtrada.")
-    st.stop()
-
-
-ct_abs = pd.crosstab(df_cross["linha"], df_cross["coluna"])
-ordem_linha = _reordenar_labels(ct_abs.index.tolist(), _ordem_referencia_variavel(var_linha))
-ordem_coluna = _reordenar_labels(ct_abs.columns.tolist(), _ordem_referencia_variavel(var_coluna))
-ct_abs = ct_abs.reindex(index=ordem_linha, columns=ordem_coluna)
-total_cross = int(ct_abs.values.sum())
-
-with col_chart:
-    if tipo_visual == "Heatmap":
-        freq_heat = (ct_abs / max(total_cross, 1)) * 100
-        anotacoes = ct_abs.copy().astype(str)
-        for i in ct_abs.index:
-            for j in ct_abs.columns:
-                n = int(ct_abs.loc[i, j])
-                f = float(freq_heat.loc[i, j])
-                anotacoes.loc[i, j] = f"{n}<br>({f:.1f}%)"
-
-        fig = go.Figure(
-            data=go.Heatmap(
-                z=ct_abs.values,
-                x=ct_abs.columns.tolist(),
-                y=ct_abs.index.tolist(),
-                text=anotacoes.values,
-                texttemplate="%{text}",
-                coloraxis="coloraxis",
-                hovertemplate=(
-                    f"{var_linha}: %{{y}}<br>"
-                    f"{var_coluna}: %{{x}}<br>"
-                    "Contagem: %{z}<extra></extra>"
-                ),
+        if tipo_visual == "Heatmap":
+            freq_heat = (ct_abs / max(total_cross, 1)) * 100
+            anotacoes = ct_abs.copy().astype(str)
+            for i in ct_abs.index:
+                for j in ct_abs.columns:
+                    n = int(ct_abs.loc[i, j])
+                    f = float(freq_heat.loc[i, j])
+                    anotacoes.loc[i, j] = f"{n}<br>({f:.1f}%)"
+
+            fig = go.Figure(
+                data=go.Heatmap(
+                    z=ct_abs.values,
+                    x=ct_abs.columns.tolist(),
+                    y=ct_abs.index.tolist(),
+                    text=anotacoes.values,
+                    texttemplate="%{text}",
+                    coloraxis="coloraxis",
+                    hovertemplate=(
+                        f"{var_linha}: %{{y}}<br>"
+                        f"{var_coluna}: %{{x}}<br>"
+                        "Contagem: %{z}<extra></extra>"
+                    ),
+                )
             )
-        )
-        fig.update_layout(
-            height=595,
-            coloraxis=dict(colorscale=["#EBF5FF", PALETA_CORES["principais"][1]], colorbar_title="Contagem"),
-            xaxis_title=var_coluna,
-            yaxis_title=var_linha,
-        )
-        mostrar_grafico(fig, f"{var_linha} x {var_coluna}")
-
-    elif tipo_visual == "Barras agrupadas":
-        plot_df = ct_abs.reset_index().melt(id_vars="linha", var_name="coluna", value_name="contagem")
-        plot_df["frequencia"] = (plot_df["contagem"] / max(total_cross, 1)) * 100
-        plot_df["texto"] = plot_df.apply(lambda r: f"{int(r['contagem'])}<br>({r['frequencia']:.1f}%)", axis=1)
-
-        fig = px.bar(
-            plot_df,
-            x="linha",
-            y="contagem",
-            color="coluna",
-            barmode="group",
-            text="texto",
-            color_discrete_sequence=PALETA_CORES["principais"] + PALETA_CORES["secundarias"],
-        )
-        fig.update_traces(textposition="outside", cliponaxis=False)
-        fig.update_layout(
-            height=595,
-            xaxis_title=var_linha,
-            yaxis_title="Contagem",
-            legend=dict(orientation="v", y=1.0, yanchor="top", x=1.02, xanchor="left"),
-            margin=dict(r=190),
-        )
-        mostrar_grafico(fig, f"{var_linha} x {var_coluna}")
-
-    else:
-        pct_linha = ct_abs.div(ct_abs.sum(axis=1).replace(0, pd.NA), axis=0) * 100
-        palette = PALETA_CORES["principais"] + PALETA_CORES["secundarias"]
-        fig = go.Figure()
-
-        for idx, col_name in enumerate(ct_abs.columns):
-            y_pct = pct_linha[col_name].fillna(0)
-            y_abs = ct_abs[col_name].fillna(0)
-            y_freq = (y_abs / max(total_cross, 1)) * 100
-            textos = [
-                f"{int(n)}<br>({f:.1f}%)" if p >= 4 else ""
-                for n, f, p in zip(y_abs.tolist(), y_freq.tolist(), y_pct.tolist())
-            ]
-
-            nome_legenda = str(col_name).strip() if str(col_name).strip() else "Sem resposta"
-            fig.add_bar(
-                x=ct_abs.index.tolist(),
-                y=y_pct.tolist(),
-                name=nome_legenda,
-                text=textos,
-                textposition="inside",
-                marker_color=palette[idx % len(palette)],
-                cliponaxis=False,
+            fig.update_layout(
+                height=595,
+                coloraxis=dict(colorscale=["#EBF5FF", PALETA_CORES["principais"][1]], colorbar_title="Contagem"),
+                xaxis_title=var_coluna,
+                yaxis_title=var_linha,
+            )
+            mostrar_grafico(fig, f"{var_linha} x {var_coluna}")
+
+        elif tipo_visual == "Barras agrupadas":
+            plot_df = ct_abs.reset_index().melt(id_vars="linha", var_name="coluna", value_name="contagem")
+            plot_df["frequencia"] = (plot_df["contagem"] / max(total_cross, 1)) * 100
+            plot_df["texto"] = plot_df.apply(lambda r: f"{int(r['contagem'])}<br>({r['frequencia']:.1f}%)", axis=1)
+
+            fig = px.bar(
+                plot_df,
+                x="linha",
+                y="contagem",
+                color="coluna",
+                barmode="group",
+                text="texto",
+                color_discrete_sequence=PALETA_CORES["principais"] + PALETA_CORES["secundarias"],
             )
+            fig.update_traces(textposition="outside", cliponaxis=False)
+            fig.update_layout(
+                height=595,
+                xaxis_title=var_linha,
+                yaxis_title="Contagem",
+                legend=dict(orientation="v", y=1.0, yanchor="top", x=1.02, xanchor="left"),
+                margin=dict(r=190),
+            )
+            mostrar_grafico(fig, f"{var_linha} x {var_coluna}")
+
+        else:
+            pct_linha = ct_abs.div(ct_abs.sum(axis=1).replace(0, pd.NA), axis=0) * 100
+            palette = PALETA_CORES["principais"] + PALETA_CORES["secundarias"]
+            fig = go.Figure()
+
+            for idx, col_name in enumerate(ct_abs.columns):
+                y_pct = pct_linha[col_name].fillna(0)
+                y_abs = ct_abs[col_name].fillna(0)
+                y_freq = (y_abs / max(total_cross, 1)) * 100
+                textos = [
+                    f"{int(n)}<br>({f:.1f}%)" if p >= 4 else ""
+                    for n, f, p in zip(y_abs.tolist(), y_freq.tolist(), y_pct.tolist())
+                ]
+
+                nome_legenda = str(col_name).strip() if str(col_name).strip() else "Sem resposta"
+                fig.add_bar(
+                    x=ct_abs.index.tolist(),
+                    y=y_pct.tolist(),
+                    name=nome_legenda,
+                    text=textos,
+                    textposition="inside",
+                    marker_color=palette[idx % len(palette)],
+                    cliponaxis=False,
+                )
+
+            fig.update_layout(
+                height=595,
+                xaxis_title=var_linha,
+                yaxis_title="% por linha",
+                yaxis_range=[0, 100],
+                barmode="stack",
+                legend=dict(orientation="v", y=1.0, yanchor="top", x=1.02, xanchor="left"),
+                margin=dict(r=190),
+            )
+            mostrar_grafico(fig, f"{var_linha} x {var_coluna}")
 
-        fig.update_layout(
-            height=595,
-            xaxis_title=var_linha,
-            yaxis_title="% por linha",
-            yaxis_range=[0, 100],
-            barmode="stack",
-            legend=dict(orientation="v", y=1.0, yanchor="top", x=1.02, xanchor="left"),
-            margin=dict(r=190),
-        )
-        mostrar_grafico(fig, f"{var_linha} x {var_coluna}")
 
+_cruzamento(base)
@@ -0,0 +1,138 @@
+import threading
+import weakref
+
+import pandas as pd
+import streamlit as st
+
+from contagem_bits import MatrizBits, mascara_de_posicoes
+from utils import ACOES_ESTRUTURANTES, agrupar_colunas_de_opcao, base_compartilhada, para_bool
+
+# Marca de recorte que não vem da base (contagem direta nas colunas).
+_FORA_DA_BASE = object()
+
+# Colunas Sim/Não avulsas que também entram na matriz compactada.
+COLUNAS_SIM_NAO_AVULSAS = ACOES_ESTRUTURANTES + [
+    "rec_federal", "rec_estadual", "rec_municipal", "rec_minc",
+    "pnab_estadual", "pnab_municipal",
+    "tcc_est_ponto", "tcc_est_pontao", "tcc_mun_ponto", "tcc_mun_pontao",
+]
+
+
+def rotulo_opcao(coluna):
+    """Texto entre o primeiro "(" e o último ")" do nome da coluna."""
+    texto = str(coluna)
+    if "(" in texto and ")" in texto:
+        return texto.split("(", 1)[1].rsplit(")", 1)[0].strip()
+    return texto
+
+
+class RegistroMultiplaEscolha:
+    """
+    Todas as perguntas de múltipla escolha ("Pergunta (Opção)") da base, mais
+    as colunas Sim/Não avulsas, montadas uma vez numa matriz booleana
+    compactada em bits (opções x linhas). Contar as marcações de qualquer
+    conjunto de opções sob qualquer filtro vira AND + popcount com a máscara
+    das linhas filtradas.
+    """
+
+    def __init__(self, df):
+        self.index = df.index
+        self.questoes = agrupar_colunas_de_opcao(df.columns)
+        self.colunas = [c for grupo in self.questoes.values() for c in grupo]
+        self.colunas += [c for c in COLUNAS_SIM_NAO_AVULSAS if c in df.columns and c not in self.colunas]
+        self.posicao = {coluna: i for i, coluna in enumerate(self.colunas)}
+        self.rotulos = {coluna: rotulo_opcao(coluna) for coluna in self.colunas}
+
+        self.matriz = MatrizBits(len(df), len(self.colunas))
+        for i, coluna in enumerate(self.colunas):
+            self.matriz.definir_coluna(i, para_bool(df[coluna]).to_numpy(dtype=bool))
+
+        # Máscara compactada por índice de recorte: as páginas contam várias
+        # perguntas sobre o mesmo `df`, que só é compactado na primeira.
+        self._mascaras = {}
+        self._lock = threading.Lock()
+
+    def linhas_de(self, df):
+        """Posições das linhas de `df` na base, ou None se `df` não vier da base."""
+        if df.index is self.index:
+            return slice(None)
+        posicoes = self.index.get_indexer(df.index)
+        if (posicoes < 0).any():
+            return None
+        return posicoes
+
+    def _esquecer(self, chave):
+        def callback(_ref):
+            with self._lock:
+                self._mascaras.pop(chave, None)
+        return callback
+
+    def mascara_de(self, df):
+        """
+        Máscara compactada das linhas de `df` (None para a base inteira), ou
+        `_FORA_DA_BASE`. Calculada uma vez por objeto de índice.
+        """
+        indice = df.index
+        with self._lock:
+            entrada = self._mascaras.get(id(indice))
+        if entrada is not None and entrada[0]() is indice:
+            return entrada[1]
+
+        linhas = self.linhas_de(df)
+        if linhas is None:
+            mascara = _FORA_DA_BASE
+        elif isinstance(linhas, slice):
+            mascara = None
+        else:
+            mascara = mascara_de_posicoes(linhas, self.matriz.n_linhas)
+        with self._lock:
+            self._mascaras[id(indice)] = (weakref.ref(indice, self._esquecer(id(indice))), mascara)
+        return mascara
+
+    def contar(self, df, colunas):
+        """`{coluna: total de "Sim"}` nas linhas de `df` para cada coluna pedida."""
+        colunas = [c for c in colunas if c in df.columns]
+        indexadas = [c for c in colunas if c in self.posicao]
+        mascara = self.mascara_de(df) if indexadas else _FORA_DA_BASE
+
+        contagens = {}
+        if mascara is not _FORA_DA_BASE:
+            totais = self.matriz.contar(mascara, [self.posicao[c] for c in indexadas])
+            contagens.update(zip(indexadas, (int(t) for t in totais)))
+        for coluna in colunas:
+            if coluna not in contagens:
+                contagens[coluna] = int(para_bool(df[coluna]).sum())
+        return contagens
+
+    def contar_alguma(self, df, colunas):
+        """Linhas de `df` com ao menos uma das colunas marcada como "Sim"."""
+        colunas = [c for c in colunas if c in df.columns]
+        if not colunas:
+            return 0
+        mascara = self.mascara_de(df) if all(c in self.posicao for c in colunas) else _FORA_DA_BASE
+        if mascara is _FORA_DA_BASE:
+            return int(pd.concat([para_bool(df[c]) for c in colunas], axis=1).any(axis=1).sum())
+        return self.matriz.contar_uniao(mascara, [self.posicao[c] for c in colunas])
+
+
+@st.cache_resource(show_spinner=False)
+def obter_registro(versao_cache="v2"):
+    return RegistroMultiplaEscolha(base_compartilhada(versao_cache))
+
+
+def contar_opcoes(df, colunas):
+    """Total de respostas "Sim" por coluna nas linhas de `df` (dict coluna -> int)."""
+    return obter_registro().contar(df, list(colunas))
+
+
+def contar_alguma_opcao(df, colunas):
+    """Quantas linhas de `df` marcaram ao menos uma das colunas."""
+    return obter_registro().contar_alguma(df, list(colunas))
+
+
+def serie_opcoes(df, colunas, rotulos=None):
+    """Contagens por rótulo da opção, na ordem das colunas (rótulos repetidos: vale o último)."""
+    contagens = contar_opcoes(df, colunas)
+    rotulos = rotulos or {}
+    dados = {rotulos.get(c, rotulo_opcao(c)): contagens[c] for c in colunas if c in contagens}
+    return pd.Series(dados, dtype="int64")
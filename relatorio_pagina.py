@@ -1,6 +1,8 @@
 import base64
 import io
+import logging
 import os
+from contextlib import contextmanager
 from datetime import datetime
 
 import streamlit as st
@@ -11,10 +13,21 @@ from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
 from config import SIGLA_PARA_ESTADO_NOME
+from exportacao_plotly import obter_servico_exportacao
+from utils import CacheLRU, chave_filtros, hash_conteudo
 
+logger = logging.getLogger(__name__)
 
 _RELATORIO_CTX_KEY = "_relatorio_pagina_ctx"
 _RELATORIO_ABA_KEY = "_relatorio_aba_atual"
+_RELATORIO_SECAO_KEY = "_relatorio_secao_atual"
+_EXIBICAO_SUPRIMIDA_KEY = "_relatorio_exibicao_suprimida"
+_RELATORIO_ORIGEM_KEY = "_relatorio_origem_atual"
+_ABAS_EXECUTADAS_KEY = "_relatorio_abas_executadas"
+
+# Chave do botão da barra lateral que solicita a montagem do PDF. Exposta para
+# que as páginas saibam, já no início da execução, que o relatório foi pedido.
+CHAVE_BOTAO_RELATORIO = "relatorio_preparar_pdf"
 
 _MAPA_RECURSOS = {
     "rec_federal": "Recursos Federais",
@@ -66,8 +79,74 @@ def iniciar_contexto_relatorio(titulo_pagina):
     st.session_state[_RELATORIO_CTX_KEY] = {
         "titulo_pagina": str(titulo_pagina or "Página"),
         "graficos": [],
+        "secoes": {},
+        "proximo_bloco": 0,
     }
     st.session_state[_RELATORIO_ABA_KEY] = "Visão geral"
+    st.session_state[_RELATORIO_SECAO_KEY] = None
+    st.session_state[_RELATORIO_ORIGEM_KEY] = None
+
+
+def relatorio_solicitado():
+    return bool(st.session_state.get(CHAVE_BOTAO_RELATORIO))
+
+
+def exibicao_suprimida():
+    """True enquanto uma aba oculta roda só para alimentar o relatório."""
+    return bool(st.session_state.get(_EXIBICAO_SUPRIMIDA_KEY))
+
+
+@contextmanager
+def suprimir_exibicao():
+    anterior = exibicao_suprimida()
+    st.session_state[_EXIBICAO_SUPRIMIDA_KEY] = True
+    try:
+        yield
+    finally:
+        st.session_state[_EXIBICAO_SUPRIMIDA_KEY] = anterior
+
+
+def _versao_filtros():
+    return chave_filtros(st.session_state.get("filtros_globais") or {})
+
+
+def executar_aba(origem, funcao):
+    """
+    Roda o corpo de uma aba marcando os gráficos registrados com `origem` e
+    guarda o contexto da execução, para que o relatório reaproveite esses
+    gráficos enquanto a aba estiver oculta e os filtros não mudarem.
+    """
+    ctx = _ctx()
+    anterior = st.session_state.get(_RELATORIO_ORIGEM_KEY)
+    st.session_state[_RELATORIO_ORIGEM_KEY] = origem
+    try:
+        funcao()
+    finally:
+        st.session_state[_RELATORIO_ORIGEM_KEY] = anterior
+    if ctx is not None:
+        executadas = st.session_state.setdefault(_ABAS_EXECUTADAS_KEY, {})
+        executadas[(ctx["titulo_pagina"], origem)] = (_versao_filtros(), ctx)
+
+
+def reaproveitar_aba(origem):
+    """
+    Copia para o relatório os gráficos da última execução da aba `origem`.
+    Devolve False se a aba ainda não rodou com os filtros atuais.
+    """
+    ctx = _ctx()
+    if ctx is None:
+        return True
+    versao, ctx_anterior = st.session_state.get(_ABAS_EXECUTADAS_KEY, {}).get(
+        (ctx["titulo_pagina"], origem), (None, None)
+    )
+    if ctx_anterior is None or versao != _versao_filtros():
+        return False
+    for item in ctx_anterior["graficos"]:
+        if item.get("origem") != origem:
+            continue
+        ctx["graficos"].append({**item, "secao": None, "ordem": (ctx["proximo_bloco"], 0)})
+        ctx["proximo_bloco"] += 1
+    return True
 
 
 def definir_aba_relatorio(nome_aba):
@@ -75,104 +154,219 @@ def definir_aba_relatorio(nome_aba):
         st.session_state[_RELATORIO_ABA_KEY] = str(nome_aba).strip()
 
 
-def registrar_grafico_plotly(fig, titulo):
+def _registrar_item(tipo, objeto, titulo):
+    """
+    Guarda apenas a referência do gráfico no contexto do relatório. A
+    rasterização (kaleido / PIL) fica para `gerar_payload_relatorio`,
+    que só roda quando o PDF é de fato solicitado.
+    """
     ctx = _ctx()
-    if ctx is None or fig is None:
+    if ctx is None or objeto is None:
         return
 
-    try:
-        fig_export = go.Figure(fig)
-        largura = int(fig_export.layout.width or 0) or 0
-        altura = int(fig_export.layout.height or 0) or 0
-        margem = fig_export.layout.margin or {}
-        y_labels = []
-        for tr in fig_export.data:
-            ys = getattr(tr, "y", None)
-            if ys is None:
-                continue
-            for y in ys:
-                y_labels.append(str(y))
-        max_label = max((len(lbl) for lbl in y_labels), default=0)
-        extra_l = min(max(max_label - 20, 0) * 3, 70)
-        margem_l = max(int(getattr(margem, "l", 0) or 0), 10) + extra_l
-        margem_r = max(int(getattr(margem, "r", 0) or 0), 28)
-        margem_t = max(int(getattr(margem, "t", 0) or 0), 56)
-        margem_b = max(int(getattr(margem, "b", 0) or 0), 36)
-        layout_patch = dict(margin=dict(l=margem_l, r=margem_r, t=margem_t, b=margem_b))
-        if largura > 0 and altura > 0:
-            layout_patch.update(dict(autosize=False, width=largura, height=altura))
-        fig_export.update_layout(**layout_patch)
-        fig_export.for_each_xaxis(lambda ax: ax.update(automargin=True))
-        fig_export.for_each_yaxis(lambda ax: ax.update(automargin=True))
-        img_bytes = fig_export.to_image(format="png", scale=2)
-        data_uri = _encode_data_uri(img_bytes, "image/png")
-    except Exception:
-        # Fallback estático: evita gráficos reativos no relatório final.
-        imagem = Image.new("RGB", (1400, 780), color=(245, 247, 251))
-        draw = ImageDraw.Draw(imagem)
-        mensagem = "Nao foi possivel exportar o grafico em PNG nesta execucao."
-        draw.text((48, 48), str(titulo or "Grafico"), fill=(18, 52, 102))
-        draw.text((48, 96), mensagem, fill=(102, 112, 133))
-        buf = io.BytesIO()
-        imagem.save(buf, format="PNG")
-        data_uri = _encode_data_uri(buf.getvalue(), "image/png")
-
     aba = st.session_state.get(_RELATORIO_ABA_KEY, "Visão geral")
+    secao = st.session_state.get(_RELATORIO_SECAO_KEY)
+    if secao is None:
+        ordem = (ctx["proximo_bloco"], 0)
+        ctx["proximo_bloco"] += 1
+    else:
+        info = ctx["secoes"][secao]
+        info["itens"] += 1
+        ordem = (info["bloco"], info["itens"])
     ctx["graficos"].append(
         {
-            "tipo": "imagem",
+            "tipo": tipo,
             "titulo": str(titulo or ""),
             "aba": str(aba or "Visão geral"),
-            "data_uri": data_uri,
+            "objeto": objeto,
+            "secao": secao,
+            "origem": st.session_state.get(_RELATORIO_ORIGEM_KEY),
+            "ordem": ordem,
         }
     )
+    if secao is not None:
+        ctx["graficos"].sort(key=lambda item: item["ordem"])
 
 
-def registrar_figura_matplotlib(fig, titulo):
+@contextmanager
+def secao_relatorio(nome):
+    """
+    Delimita um bloco da página que pode ser reexecutado sozinho (fragmento).
+    Na execução completa o bloco reserva sua posição no relatório; numa
+    reexecução isolada os gráficos dele são substituídos na mesma posição e aba.
+    """
     ctx = _ctx()
-    if ctx is None or fig is None:
+    if ctx is None:
+        yield
         return
 
+    info = ctx["secoes"].get(nome)
+    if info is None:
+        info = {
+            "bloco": ctx["proximo_bloco"],
+            "aba": st.session_state.get(_RELATORIO_ABA_KEY, "Visão geral"),
+            "origem": st.session_state.get(_RELATORIO_ORIGEM_KEY),
+        }
+        ctx["proximo_bloco"] += 1
+        ctx["secoes"][nome] = info
+    else:
+        ctx["graficos"] = [item for item in ctx["graficos"] if item.get("secao") != nome]
+        st.session_state[_RELATORIO_ABA_KEY] = info["aba"]
+        st.session_state[_RELATORIO_ORIGEM_KEY] = info["origem"]
+    info["itens"] = 0
+
+    anterior = st.session_state.get(_RELATORIO_SECAO_KEY)
+    st.session_state[_RELATORIO_SECAO_KEY] = nome
     try:
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=170, bbox_inches="tight")
-        data_uri = _encode_data_uri(buf.getvalue(), "image/png")
-    except Exception:
-        return
+        yield
+    finally:
+        st.session_state[_RELATORIO_SECAO_KEY] = anterior
 
-    aba = st.session_state.get(_RELATORIO_ABA_KEY, "Visão geral")
-    ctx["graficos"].append(
-        {
-            "tipo": "imagem",
-            "titulo": str(titulo or ""),
-            "aba": str(aba or "Visão geral"),
-            "data_uri": data_uri,
-        }
-    )
+
+def registrar_grafico_plotly(fig, titulo):
+    _registrar_item("plotly", fig, titulo)
 
 
 def registrar_imagem_array(img_array, titulo):
-    ctx = _ctx()
-    if ctx is None or img_array is None:
-        return
+    _registrar_item("array", img_array, titulo)
+
+
+def registrar_imagem_png(png_bytes, titulo):
+    """Imagem já rasterizada (ex.: mapa servido do cache de mapas)."""
+    _registrar_item("png", png_bytes, titulo)
+
+
+def _figura_plotly_para_exportacao(fig):
+    fig_export = go.Figure(fig)
+    largura = int(fig_export.layout.width or 0) or 0
+    altura = int(fig_export.layout.height or 0) or 0
+    margem = fig_export.layout.margin or {}
+    y_labels = []
+    for tr in fig_export.data:
+        ys = getattr(tr, "y", None)
+        if ys is None:
+            continue
+        for y in ys:
+            y_labels.append(str(y))
+    max_label = max((len(lbl) for lbl in y_labels), default=0)
+    extra_l = min(max(max_label - 20, 0) * 3, 70)
+    margem_l = max(int(getattr(margem, "l", 0) or 0), 10) + extra_l
+    margem_r = max(int(getattr(margem, "r", 0) or 0), 28)
+    margem_t = max(int(getattr(margem, "t", 0) or 0), 56)
+    margem_b = max(int(getattr(margem, "b", 0) or 0), 36)
+    layout_patch = dict(margin=dict(l=margem_l, r=margem_r, t=margem_t, b=margem_b))
+    if largura > 0 and altura > 0:
+        layout_patch.update(dict(autosize=False, width=largura, height=altura))
+    fig_export.update_layout(**layout_patch)
+    fig_export.for_each_xaxis(lambda ax: ax.update(automargin=True))
+    fig_export.for_each_yaxis(lambda ax: ax.update(automargin=True))
+    return fig_export
+
+
+def _png_placeholder(titulo):
+    # Fallback estático: evita gráficos reativos no relatório final.
+    imagem = Image.new("RGB", (1400, 780), color=(245, 247, 251))
+    draw = ImageDraw.Draw(imagem)
+    mensagem = "Nao foi possivel exportar o grafico em PNG nesta execucao."
+    draw.text((48, 48), str(titulo or "Grafico"), fill=(18, 52, 102))
+    draw.text((48, 96), mensagem, fill=(102, 112, 133))
+    buf = io.BytesIO()
+    imagem.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@st.cache_resource(show_spinner=False)
+def _cache_png():
+    """PNGs já exportados, compartilhados entre sessões e indexados pelo conteúdo."""
+    return CacheLRU(max_itens=512, max_bytes=256 * 1024 * 1024)
+
+
+def _rasterizar_item(item):
+    """PNGs prontos e arrays de imagem (Plotly é exportado em lote); arrays passam pelo cache."""
+    tipo = item.get("tipo")
+    objeto = item.get("objeto")
+    if tipo == "png":
+        return bytes(objeto)
+    if tipo != "array":
+        return b""
 
     try:
-        imagem = Image.fromarray(img_array)
-        buf = io.BytesIO()
-        imagem.save(buf, format="PNG")
-        data_uri = _encode_data_uri(buf.getvalue(), "image/png")
+        cache = _cache_png()
+        chave = hash_conteudo("array", objeto.shape, objeto.dtype, objeto.tobytes())
+        img_bytes = cache.obter(chave)
+        if img_bytes is None:
+            buf = io.BytesIO()
+            Image.fromarray(objeto).save(buf, format="PNG")
+            img_bytes = buf.getvalue()
+            cache.guardar(chave, img_bytes)
+        return img_bytes
     except Exception:
-        return
+        return b""
+
+
+def _rasterizar_plotly_em_lote(itens, escala=2):
+    """
+    Exporta todas as figuras Plotly do relatório de uma vez pelo serviço
+    persistente; só as ausentes do cache de PNG vão para o kaleido.
+    """
+    cache = _cache_png()
+    resultados = [None] * len(itens)
+    pendentes = []
+    for i, item in enumerate(itens):
+        try:
+            fig_json = _figura_plotly_para_exportacao(item.get("objeto")).to_json()
+        except Exception:
+            resultados[i] = _png_placeholder(item.get("titulo"))
+            continue
+        chave = hash_conteudo("plotly", fig_json, f"scale={escala}")
+        img_bytes = cache.obter(chave)
+        if img_bytes is None:
+            pendentes.append((i, chave, fig_json))
+        else:
+            resultados[i] = img_bytes
+
+    if pendentes:
+        lote = [(itens[i].get("titulo", ""), fig_json) for i, _, fig_json in pendentes]
+        renderizados = obter_servico_exportacao().renderizar_lote(lote, scale=escala)
+        for (i, chave, _), img_bytes in zip(pendentes, renderizados):
+            if img_bytes:
+                cache.guardar(chave, img_bytes)
+                resultados[i] = img_bytes
+            else:
+                resultados[i] = _png_placeholder(itens[i].get("titulo"))
 
-    aba = st.session_state.get(_RELATORIO_ABA_KEY, "Visão geral")
-    ctx["graficos"].append(
-        {
-            "tipo": "imagem",
-            "titulo": str(titulo or ""),
-            "aba": str(aba or "Visão geral"),
-            "data_uri": data_uri,
-        }
+    estatisticas = cache.estatisticas()
+    logger.info(
+        "Cache de PNG do relatório: %d acerto(s), %d falha(s) (%.0f%%), %d item(ns), %.1f MB.",
+        estatisticas["acertos"], estatisticas["falhas"], estatisticas["taxa_acerto"] * 100,
+        estatisticas["itens"], estatisticas["bytes"] / 1e6,
     )
+    return resultados
+
+
+def _rasterizar_graficos(graficos):
+    """Gráficos do contexto convertidos em imagens PNG (data URI)."""
+    indices_plotly = [i for i, item in enumerate(graficos) if item.get("tipo") == "plotly"]
+    pngs_plotly = _rasterizar_plotly_em_lote([graficos[i] for i in indices_plotly])
+    pngs = dict(zip(indices_plotly, pngs_plotly))
+
+    saida = []
+    for i, item in enumerate(graficos):
+        if item.get("tipo") == "imagem":
+            saida.append(item)
+            continue
+        img_bytes = pngs[i] if i in pngs else _rasterizar_item(item)
+        if not img_bytes:
+            continue
+        saida.append(
+            {
+                "tipo": "imagem",
+                "titulo": item.get("titulo", ""),
+                "aba": item.get("aba", "Visão geral"),
+                "data_uri": _encode_data_uri(img_bytes, "image/png"),
+            }
+        )
+    return saida
 
 
 def _rotulo_parenteses(valor):
@@ -230,12 +424,13 @@ def _resumo_filtros(filtros):
 
 def gerar_payload_relatorio(filtros):
     ctx = _ctx() or {"titulo_pagina": "Página", "graficos": []}
+    graficos = _rasterizar_graficos(ctx.get("graficos", []))
 
     return {
         "titulo_pagina": ctx.get("titulo_pagina", "Página"),
         "gerado_em": datetime.now().strftime("%d/%m/%Y %H:%M"),
         "filtros": _resumo_filtros(filtros),
-        "graficos": list(ctx.get("graficos", [])),
+        "graficos": graficos,
         "fonte_rodape": (
             "Fonte: Diagnóstico Econômico da Cultura Viva. Projeto de pesquisa vinculado à Política Nacional de Cultura Viva."
         ),
@@ -738,3 +933,17 @@ def montar_pdf_relatorio(payload, aba_preferida=None):
 
     c.save()
     return buf.getvalue()
+
+
+def gerar_pdf_relatorio(filtros, aba_preferida=None):
+    """
+    Monta o PDF da página atual sob demanda (somente quando solicitado).
+    Quando a montagem falha, registra o erro, avisa o usuário e retorna bytes vazios.
+    """
+    try:
+        payload = gerar_payload_relatorio(filtros)
+        return montar_pdf_relatorio(payload, aba_preferida=aba_preferida)
+    except Exception:
+        logger.exception("Falha ao montar o relatório em PDF.")
+        st.error("Não foi possível gerar o PDF nesta execução. Recarregue a página e tente novamente.")
+        return b""
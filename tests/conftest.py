@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import FAIXAS_RECEITA, ORDEM_FAIXA_POPULACIONAL, REGIOES_POR_UF  # noqa: E402
+from indice_filtros import FLAGS_RECURSOS  # noqa: E402
+from utils import ACOES_ESTRUTURANTES  # noqa: E402
+
+LINGUAGENS = ['Música', 'Dança', 'Teatro', 'Audiovisual', 'Artes Visuais']
+ACOES_AMOSTRA = ACOES_ESTRUTURANTES[:6]
+
+
+@pytest.fixture
+def base_sintetica():
+    """Base pequena com as colunas derivadas que os filtros usam (valores aleatórios, semente fixa)."""
+    rng = np.random.default_rng(42)
+    n = 500
+    ufs = sorted(REGIOES_POR_UF)[:8]
+    estado = rng.choice(ufs + [None], n)
+    df = pd.DataFrame({
+        'estado': estado,
+        'regiao': [REGIOES_POR_UF.get(uf) for uf in estado],
+        'cidade': rng.choice([f'Cidade {i}' for i in range(40)] + [None], n),
+        'faixa_populacional': pd.Categorical(rng.choice(ORDEM_FAIXA_POPULACIONAL, n), categories=ORDEM_FAIXA_POPULACIONAL),
+        'tipo_ponto': rng.choice(['Ponto', 'Pontão'], n),
+        'registro': rng.choice(['CNPJ', 'CPF', 'Coletivo', None], n),
+        'faixa_receita': rng.choice(FAIXAS_RECEITA + [None], n),
+        'linguagens_lista': [
+            list(rng.choice(LINGUAGENS, size=rng.integers(0, 3), replace=False)) for _ in range(n)
+        ],
+    })
+    for coluna in ACOES_AMOSTRA:
+        df[coluna] = rng.choice(['Sim', 'Não', None], n)
+    for coluna in FLAGS_RECURSOS:
+        df[coluna] = rng.random(n) < 0.3
+    df['Possui sede própria?'] = rng.choice(['Sim', 'Não'], n)
+    return df
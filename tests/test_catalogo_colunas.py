@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+from catalogo_colunas import CatalogoColunas, normalizar_coluna, obter_catalogo
+from utils import normalizar_texto
+
+COLUNAS = [
+    'estado',
+    'Possui sede própria?',
+    'Possui sede própria? (Alugada)',
+    'Quais ações estruturantes o Ponto desenvolve? (Cultura Digital)',
+    'Quais ações estruturantes o Ponto desenvolve? (Cultura e Saúde)',
+    'Quais ações estruturantes o Ponto desenvolve? (Livro, Leitura e Literatura)',
+    'Onde comercializa? (Feiras)',
+    'Onde comercializa? (Internet / redes sociais)',
+    'Faixa de receita anual',
+    'Receita anual',
+    'ESTADO ',
+    'Produtos ',
+    'Recebeu recursos de editais públicos?',
+]
+
+ALVOS = [
+    'estado',
+    'Estado',
+    'possui sede propria?',
+    'sede própria',
+    'Cultura Digital',
+    'cultura',
+    'acoes estruturantes o ponto',
+    'comercializa? (internet',
+    'Receita anual',
+    'receita',
+    'produtos',
+    'editais publicos',
+    'coluna que não existe',
+    '',
+]
+
+
+def _encontrar_coluna_linear(colunas, texto_alvo):
+    """Versão linear anterior ao catálogo: nome exato, senão a primeira coluna que contém o alvo."""
+    alvo = normalizar_texto(texto_alvo)
+    for coluna in colunas:
+        if normalizar_texto(coluna) == alvo:
+            return coluna
+    for coluna in colunas:
+        if alvo in normalizar_texto(coluna):
+            return coluna
+    return None
+
+
+@pytest.mark.parametrize('alvo', ALVOS)
+def test_encontrar_igual_a_busca_linear(alvo):
+    catalogo = CatalogoColunas(COLUNAS, normalizar_texto)
+    assert catalogo.encontrar(alvo) == _encontrar_coluna_linear(COLUNAS, alvo)
+    # Segunda consulta vem do memo e deve ser idêntica.
+    assert catalogo.encontrar(alvo) == _encontrar_coluna_linear(COLUNAS, alvo)
+
+
+@pytest.mark.parametrize('prefixo', ['quais acoes estruturantes', 'onde comercializa?', 'possui', 'zzz'])
+def test_prefixos_igual_a_varredura(prefixo):
+    catalogo = CatalogoColunas(COLUNAS, normalizar_coluna)
+    esperado = [c for c in COLUNAS if normalizar_coluna(c).startswith(prefixo)]
+    assert catalogo.todas_por_prefixo(prefixo) == esperado
+    assert catalogo.por_prefixo([prefixo]) == (esperado[0] if esperado else None)
+
+
+def test_por_trechos_primeira_coluna_com_todos():
+    catalogo = CatalogoColunas(COLUNAS, normalizar_coluna)
+    assert catalogo.por_trechos('acoes', 'saude') == COLUNAS[4]
+    assert catalogo.por_trechos('sede', 'inexistente') is None
+
+
+def test_obter_catalogo_reaproveita_por_index():
+    df = pd.DataFrame(columns=COLUNAS)
+    catalogo = obter_catalogo(df.columns)
+    assert obter_catalogo(df.columns) is catalogo
+    assert obter_catalogo(df.copy(deep=False).columns) is catalogo
+    # Mesmos nomes em outro objeto caem no cache por nomes.
+    assert obter_catalogo(list(COLUNAS)) is catalogo
+    assert obter_catalogo(df.columns, normalizar_texto) is not catalogo
+
+
+def test_estatisticas_contam_consultas_e_memo():
+    catalogo = CatalogoColunas(COLUNAS, normalizar_coluna)
+    catalogo.encontrar('estado')
+    catalogo.encontrar('estado')
+    catalogo.todas_por_prefixo('possui')
+
+    estatisticas = catalogo.estatisticas()
+    assert estatisticas['consultas'] == 3
+    assert estatisticas['acertos_memo'] == 1
+    assert estatisticas['tempo_total_ms'] >= 0
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ACOES_AMOSTRA
+from contagem_bits import MatrizBits, compactar_mascara
+from questoes_multipla_escolha import RegistroMultiplaEscolha
+from utils import para_bool
+
+
+@pytest.fixture
+def matriz_bool():
+    # 1001 linhas: a última fatia de bytes fica incompleta.
+    rng = np.random.default_rng(7)
+    return pd.DataFrame(rng.random((1001, 12)) < 0.35, columns=[f'c{i}' for i in range(12)])
+
+
+@pytest.mark.parametrize('semente', range(10))
+def test_contar_igual_a_soma_do_dataframe(matriz_bool, semente):
+    matriz = MatrizBits.de_matriz(matriz_bool.to_numpy())
+    mascara = np.random.default_rng(semente).random(len(matriz_bool)) < 0.5
+
+    np.testing.assert_array_equal(matriz.contar(), matriz_bool.sum().to_numpy())
+    np.testing.assert_array_equal(
+        matriz.contar(compactar_mascara(mascara)),
+        matriz_bool[mascara].sum().to_numpy(),
+    )
+    np.testing.assert_array_equal(
+        matriz.contar(compactar_mascara(mascara), [3, 0, 7]),
+        matriz_bool[mascara][['c3', 'c0', 'c7']].sum().to_numpy(),
+    )
+
+
+def test_contar_lote_empilha_contar(matriz_bool):
+    matriz = MatrizBits.de_matriz(matriz_bool.to_numpy())
+    mascaras = [np.arange(len(matriz_bool)) % k == 0 for k in (2, 3, 5)]
+
+    lote = matriz.contar_lote([compactar_mascara(m) for m in mascaras], [0, 4, 11])
+    esperado = np.vstack([matriz_bool[m][['c0', 'c4', 'c11']].sum().to_numpy() for m in mascaras])
+    np.testing.assert_array_equal(lote, esperado)
+    assert matriz.contar_lote([]).shape == (0, 12)
+
+
+def test_contar_uniao_igual_a_any(matriz_bool):
+    matriz = MatrizBits.de_matriz(matriz_bool.to_numpy())
+    mascara = np.arange(len(matriz_bool)) % 3 == 0
+
+    esperado = int(matriz_bool[mascara][['c1', 'c5']].any(axis=1).sum())
+    assert matriz.contar_uniao(compactar_mascara(mascara), [1, 5]) == esperado
+    assert matriz.contar_uniao(None, [1, 5]) == int(matriz_bool[['c1', 'c5']].any(axis=1).sum())
+    assert matriz.contar_uniao(None, []) == 0
+
+
+def test_registro_conta_recortes_da_base(base_sintetica):
+    registro = RegistroMultiplaEscolha(base_sintetica)
+    recorte = base_sintetica[base_sintetica['tipo_ponto'] == 'Ponto']
+
+    for df in (base_sintetica, recorte):
+        esperado = {c: int(para_bool(df[c]).sum()) for c in ACOES_AMOSTRA}
+        assert registro.contar(df, ACOES_AMOSTRA) == esperado
+        alguma = int(pd.concat([para_bool(df[c]) for c in ACOES_AMOSTRA], axis=1).any(axis=1).sum())
+        assert registro.contar_alguma(df, ACOES_AMOSTRA) == alguma
+
+
+def test_registro_compacta_cada_recorte_uma_vez(base_sintetica):
+    registro = RegistroMultiplaEscolha(base_sintetica)
+    recorte = base_sintetica.iloc[::2]
+
+    primeira = registro.mascara_de(recorte)
+    assert registro.mascara_de(recorte) is primeira
+    assert registro.mascara_de(recorte.copy(deep=False)) is primeira
+    assert registro.mascara_de(base_sintetica) is None
+
+
+def test_registro_recorte_de_outra_base(base_sintetica):
+    registro = RegistroMultiplaEscolha(base_sintetica)
+    outra = base_sintetica.set_index(base_sintetica.index + 10_000)
+
+    esperado = {c: int(para_bool(outra[c]).sum()) for c in ACOES_AMOSTRA}
+    assert registro.contar(outra, ACOES_AMOSTRA) == esperado
@@ -0,0 +1,134 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ACOES_AMOSTRA, LINGUAGENS
+from indice_filtros import DIMENSOES_CATEGORICAS, FLAGS_RECURSOS, IndiceFiltros
+from utils import ACOES_ESTRUTURANTES, mascara_filtros, para_bool
+
+
+def _aplicar_filtros_original(df, filtros):
+    """`utils.aplicar_filtros` anterior ao índice (cópia + fatias encadeadas), referência de resultado e tempo."""
+    filtrado = df.copy()
+    if filtros.get('estado'):
+        filtrado = filtrado[filtrado['estado'].isin(filtros['estado'])]
+    if filtros.get('municipio'):
+        filtrado = filtrado[filtrado['cidade'].isin(filtros['municipio'])]
+    if filtros.get('regiao'):
+        filtrado = filtrado[filtrado['regiao'].isin(filtros['regiao'])]
+    if filtros.get('faixa_populacional'):
+        filtrado = filtrado[filtrado['faixa_populacional'].isin(filtros['faixa_populacional'])]
+    if filtros.get('tipo_ponto'):
+        filtrado = filtrado[filtrado['tipo_ponto'].isin(filtros['tipo_ponto'])]
+    if filtros.get('registro'):
+        filtrado = filtrado[filtrado['registro'].isin(filtros['registro'])]
+    if filtros.get('faixa_receita'):
+        filtrado = filtrado[filtrado['faixa_receita'].isin(filtros['faixa_receita'])]
+    if filtros.get('linguagem_artistica'):
+        selecionadas = set(filtros['linguagem_artistica'])
+        filtrado = filtrado[filtrado['linguagens_lista'].apply(lambda itens: any(i in selecionadas for i in itens))]
+    if filtros.get('acoes_estruturantes'):
+        colunas_acao = [c for c in ACOES_ESTRUTURANTES if c in filtrado.columns]
+        if colunas_acao:
+            mascara = False
+            for coluna in colunas_acao:
+                if coluna in filtros['acoes_estruturantes']:
+                    mascara = mascara | para_bool(filtrado[coluna])
+            filtrado = filtrado[mascara]
+    if filtros.get('acessos_recursos_or'):
+        colunas = [c for c in filtros['acessos_recursos_or'] if c in filtrado.columns]
+        if colunas:
+            mascara_or = pd.Series(False, index=filtrado.index)
+            for coluna in colunas:
+                mascara_or = mascara_or | para_bool(filtrado[coluna])
+            filtrado = filtrado[mascara_or]
+    for chave, coluna in filtros.get('filtros_booleanos', {}).items():
+        if coluna in filtrado.columns and filtros.get(chave) in ['Sim', 'Não']:
+            filtrado = filtrado[para_bool(filtrado[coluna]) == (filtros[chave] == 'Sim')]
+    return filtrado
+
+
+def _filtros_aleatorios(df, rng):
+    filtros = {}
+    for dimensao, coluna in DIMENSOES_CATEGORICAS.items():
+        if rng.random() < 0.4:
+            valores = df[coluna].dropna().unique().tolist()
+            filtros[dimensao] = list(rng.choice(valores, size=rng.integers(1, 4)))
+    if rng.random() < 0.4:
+        filtros['linguagem_artistica'] = list(rng.choice(LINGUAGENS, size=rng.integers(1, 3), replace=False))
+    if rng.random() < 0.3:
+        filtros['acoes_estruturantes'] = list(rng.choice(ACOES_AMOSTRA, size=rng.integers(1, 3), replace=False))
+    if rng.random() < 0.3:
+        filtros['acessos_recursos_or'] = list(rng.choice(FLAGS_RECURSOS, size=rng.integers(1, 3), replace=False))
+    if rng.random() < 0.3:
+        filtros['sede'] = str(rng.choice(['Sim', 'Não']))
+        filtros['filtros_booleanos'] = {'sede': 'Possui sede própria?'}
+    return filtros
+
+
+@pytest.mark.parametrize('semente', range(50))
+def test_mascara_igual_a_referencia(base_sintetica, semente):
+    rng = np.random.default_rng(semente)
+    indice = IndiceFiltros(base_sintetica)
+    filtros = _filtros_aleatorios(base_sintetica, rng)
+
+    esperado = mascara_filtros(base_sintetica, filtros)
+    np.testing.assert_array_equal(indice.mascara(filtros), esperado)
+    assert indice.contar(filtros) == int(esperado.sum())
+    np.testing.assert_array_equal(indice.linhas(filtros), np.flatnonzero(esperado))
+
+
+def test_sem_filtros_seleciona_tudo(base_sintetica):
+    indice = IndiceFiltros(base_sintetica)
+    assert indice.contar({}) == len(base_sintetica)
+
+
+def test_facetas_ignoram_a_propria_dimensao(base_sintetica):
+    indice = IndiceFiltros(base_sintetica)
+    filtros = {'estado': [base_sintetica['estado'].dropna().iloc[0]], 'tipo_ponto': ['Ponto']}
+    facetas = indice.contagens_facetadas(filtros)
+
+    sem_estado = base_sintetica[mascara_filtros(base_sintetica, {'tipo_ponto': ['Ponto']})]
+    assert facetas['estado'] == {
+        estado: int((sem_estado['estado'] == estado).sum()) for estado in facetas['estado']
+    }
+
+
+def test_cobre_apenas_o_proprio_objeto(base_sintetica):
+    indice = IndiceFiltros(base_sintetica)
+    assert indice.cobre(base_sintetica)
+    assert not indice.cobre(base_sintetica.copy(deep=False))
+    assert not indice.cobre(base_sintetica.iloc[::-1].reset_index(drop=True))
+
+
+@pytest.mark.parametrize('semente', range(10))
+def test_linhas_iguais_ao_aplicar_filtros_original(base_sintetica, semente):
+    filtros = _filtros_aleatorios(base_sintetica, np.random.default_rng(semente))
+    esperado = base_sintetica.index.get_indexer(_aplicar_filtros_original(base_sintetica, filtros).index)
+    np.testing.assert_array_equal(IndiceFiltros(base_sintetica).linhas(filtros), esperado)
+
+
+@pytest.mark.skipif(not os.environ.get('PONTOS_BENCHMARK'), reason='benchmark: defina PONTOS_BENCHMARK=1')
+def test_benchmark_contra_aplicar_filtros_original(base_sintetica):
+    base = pd.concat([base_sintetica] * 40, ignore_index=True)
+    indice = IndiceFiltros(base)
+    rng = np.random.default_rng(0)
+    combinacoes = [_filtros_aleatorios(base, rng) for _ in range(30)]
+
+    inicio = time.perf_counter()
+    originais = [_aplicar_filtros_original(base, filtros) for filtros in combinacoes]
+    tempo_original = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    linhas = [indice.linhas(filtros) for filtros in combinacoes]
+    tempo_indice = time.perf_counter() - inicio
+
+    for original, posicoes in zip(originais, linhas):
+        np.testing.assert_array_equal(posicoes, original.index.to_numpy())
+    print(
+        f'\n{len(combinacoes)} combinações em {len(base)} linhas: '
+        f'aplicar_filtros original {tempo_original * 1000:.1f} ms, índice {tempo_indice * 1000:.1f} ms'
+    )
+    assert tempo_indice < tempo_original
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+import ingestao  # noqa: E402
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    caminho_csv = tmp_path / 'base.csv'
+    caminho_csv.write_text('estado,contagem,Pontão\nBA,10,Sim\nSP,20,Não\n', encoding='utf-8')
+    return str(caminho_csv), str(tmp_path / 'base.parquet')
+
+
+def test_snapshot_recem_gerado_e_valido(arquivos):
+    caminho_csv, caminho_snapshot = arquivos
+    ingestao.gerar_snapshot(caminho_csv, caminho_snapshot)
+    assert ingestao.snapshot_valido(caminho_csv, caminho_snapshot)
+    pd.testing.assert_frame_equal(
+        ingestao.carregar_base_colunar(caminho_csv, caminho_snapshot), ingestao.ler_csv(caminho_csv)
+    )
+    # Sem temporários esquecidos no diretório.
+    assert sorted(os.listdir(os.path.dirname(caminho_snapshot))) == ['base.csv', 'base.parquet']
+
+
+def test_data_de_modificacao_nao_invalida(arquivos):
+    caminho_csv, caminho_snapshot = arquivos
+    ingestao.gerar_snapshot(caminho_csv, caminho_snapshot)
+    os.utime(caminho_csv, ns=(0, 0))
+    assert ingestao.snapshot_valido(caminho_csv, caminho_snapshot)
+
+
+def test_edicao_com_mesmo_tamanho_invalida(arquivos):
+    caminho_csv, caminho_snapshot = arquivos
+    ingestao.gerar_snapshot(caminho_csv, caminho_snapshot)
+    info = os.stat(caminho_csv)
+    with open(caminho_csv, 'r+', encoding='utf-8') as arquivo:
+        conteudo = arquivo.read()
+        arquivo.seek(0)
+        arquivo.write(conteudo.replace('10', '11'))
+    os.utime(caminho_csv, ns=(info.st_atime_ns, info.st_mtime_ns))
+    assert os.stat(caminho_csv).st_size == info.st_size
+    assert not ingestao.snapshot_valido(caminho_csv, caminho_snapshot)
+
+
+def test_outra_versao_de_formato_invalida(arquivos, monkeypatch):
+    caminho_csv, caminho_snapshot = arquivos
+    ingestao.gerar_snapshot(caminho_csv, caminho_snapshot)
+    monkeypatch.setattr(ingestao, 'VERSAO_FORMATO', ingestao.VERSAO_FORMATO + 1)
+    assert not ingestao.snapshot_valido(caminho_csv, caminho_snapshot)
+
+
+def test_schema_divergente_invalida(arquivos):
+    caminho_csv, caminho_snapshot = arquivos
+    registro = ingestao.gerar_snapshot(caminho_csv, caminho_snapshot)
+    # Mesmo registro, mas colunas diferentes das que ele descreve.
+    tabela = pa.table({'estado': ['BA', 'SP']})
+    tabela = tabela.replace_schema_metadata({ingestao.CHAVE_METADADOS: json.dumps(registro).encode('utf-8')})
+    pq.write_table(tabela, caminho_snapshot)
+    assert not ingestao.snapshot_valido(caminho_csv, caminho_snapshot)
+
+
+def test_snapshot_sem_registro_invalido(arquivos):
+    caminho_csv, caminho_snapshot = arquivos
+    pq.write_table(pa.table({'estado': ['BA', 'SP']}), caminho_snapshot)
+    assert not ingestao.snapshot_valido(caminho_csv, caminho_snapshot)
@@ -0,0 +1,84 @@
+import ast
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from catalogo_colunas import CatalogoColunas, normalizar_coluna
+from ingestao import CAMINHO_CSV
+from manifesto_colunas import DIRETORIO_BASE, colunas_descartadas, manter_coluna
+from utils import ACOES_ESTRUTURANTES, normalizar_texto
+
+# Textos curtos ("Sim", "Não", "Outros") aparecem em listas de valores, não em buscas de coluna.
+# Medido em `normalizar_coluna`: `normalizar_texto` intercala espaços entre os caracteres.
+TAMANHO_MINIMO_ALVO = 8
+
+
+def _eh_busca_de_coluna(chamada):
+    """Chamadas como `encontrar_coluna(...)`, `catalogo.encontrar(...)` e `_find_col(...)`."""
+    funcao = chamada.func
+    nome = funcao.attr if isinstance(funcao, ast.Attribute) else getattr(funcao, 'id', '')
+    return 'encontrar' in nome or 'find_col' in nome
+
+
+def _alvos_de_busca():
+    """
+    Literais que as páginas podem usar para localizar colunas: argumentos de
+    chamadas e itens de listas, tuplas e dicionários (mapas rótulo -> coluna).
+    Argumentos das funções de busca de coluna entram sempre, mesmo curtos.
+    """
+    arquivos = [os.path.join(DIRETORIO_BASE, 'utils.py'), os.path.join(DIRETORIO_BASE, 'filters.py')]
+    arquivos += sorted(glob.glob(os.path.join(DIRETORIO_BASE, 'paginas', '*.py')))
+    alvos = set()
+    for caminho in arquivos:
+        with open(caminho, 'r', encoding='utf-8-sig') as arquivo:
+            arvore = ast.parse(arquivo.read())
+        for no in ast.walk(arvore):
+            busca = False
+            if isinstance(no, ast.Call):
+                itens = no.args
+                busca = _eh_busca_de_coluna(no)
+            elif isinstance(no, (ast.List, ast.Tuple, ast.Set)):
+                itens = no.elts
+            elif isinstance(no, ast.Dict):
+                itens = [chave for chave in no.keys if chave is not None] + no.values
+            else:
+                continue
+            for item in itens:
+                if isinstance(item, ast.Constant) and isinstance(item.value, str):
+                    if busca or len(normalizar_coluna(item.value)) >= TAMANHO_MINIMO_ALVO:
+                        alvos.add(item.value)
+    return sorted(alvos)
+
+
+def test_lista_sem_repeticoes():
+    caminho = os.path.join(DIRETORIO_BASE, 'colunas_descartadas.txt')
+    with open(caminho, 'r', encoding='utf-8-sig') as arquivo:
+        linhas = [linha for linha in arquivo.read().splitlines() if linha.strip()]
+    assert len(linhas) == len(set(linhas))
+
+
+def test_colunas_dos_filtros_sao_mantidas():
+    assert all(manter_coluna(coluna) for coluna in ACOES_ESTRUTURANTES)
+
+
+def test_nenhuma_busca_cai_em_coluna_descartada():
+    descartadas = CatalogoColunas(sorted(colunas_descartadas()), normalizar_texto)
+    encontradas = {}
+    for alvo in _alvos_de_busca():
+        coluna = descartadas.encontrar(alvo) or next(iter(descartadas.todas_por_prefixo(normalizar_texto(alvo))), None)
+        if coluna is not None:
+            encontradas[alvo] = coluna
+    assert encontradas == {}
+
+
+@pytest.mark.skipif(not os.path.exists(CAMINHO_CSV), reason='base_final.csv ausente')
+def test_buscas_resolvem_igual_com_e_sem_descarte():
+    cabecalho = [str(c) for c in pd.read_csv(CAMINHO_CSV, nrows=0, encoding='utf-8-sig').columns]
+    completo = CatalogoColunas(cabecalho, normalizar_texto)
+    mantido = CatalogoColunas([c for c in cabecalho if manter_coluna(c)], normalizar_texto)
+    for alvo in _alvos_de_busca() + ['Pontão', 'Registro', 'cidade_api', 'uf_api']:
+        assert completo.encontrar(alvo) == mantido.encontrar(alvo), alvo
+        prefixo = normalizar_texto(alvo)
+        assert completo.todas_por_prefixo(prefixo) == mantido.todas_por_prefixo(prefixo), alvo
@@ -198,9 +198,21 @@ def _obter_api_key() -> str:
 
 def _montar_prompt_usuario(solicitacao: str, catalogo: dict[str, Any]) -> str:
     resumo = _resumo_catalogo(catalogo)
-    catalogo_serializado = json.dumps(catalogo, ensure_ascii=False, indent=2)
-    municipios_disponiveis = _normalizar_opcoes(catalogo.get('municipio', []))
-    anexo_municipios = '\n'.join(f'- {cidade}' for cidade in municipios_disponiveis)
+    # Os municípios vão só no anexo (uma linha por UF quando houver o agrupamento),
+    # e não repetidos no catálogo: são a maior parte do prompt.
+    catalogo_sem_municipios = {
+        chave: valor for chave, valor in catalogo.items() if chave not in ('municipio', 'municipios_por_estado')
+    }
+    catalogo_serializado = json.dumps(catalogo_sem_municipios, ensure_ascii=False, indent=2)
+    municipios_por_estado = catalogo.get('municipios_por_estado')
+    if isinstance(municipios_por_estado, dict) and municipios_por_estado:
+        anexo_municipios = '\n'.join(
+            f'- {uf}: ' + '; '.join(_normalizar_opcoes(cidades))
+            for uf, cidades in sorted(municipios_por_estado.items())
+        )
+    else:
+        municipios_disponiveis = _normalizar_opcoes(catalogo.get('municipio', []))
+        anexo_municipios = '\n'.join(f'- {cidade}' for cidade in municipios_disponiveis)
 
     return f"""
 Tarefa:
@@ -231,7 +243,7 @@ Regras adicionais de extração:
 Catálogo oficial completo (valores permitidos):
 {catalogo_serializado}
 
-Anexo: Municípios disponíveis para seleção (use somente estes nomes no campo municipio)
+Anexo: Municípios disponíveis para seleção, por UF (use somente estes nomes no campo municipio)
 {anexo_municipios}
 
 Retorne somente o objeto JSON estruturado conforme schema.
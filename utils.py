@@ -1,12 +1,18 @@
-﻿import json
+﻿import hashlib
+import json
 import re
+import threading
 import unicodedata
+import uuid
 import os
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
 import streamlit as st
 
-from config import REGIOES_POR_UF
+from config import FAIXAS_RECEITA, ORDEM_FAIXA_POPULACIONAL, REGIOES_POR_UF
+from ingestao import carregar_base_colunar
 
 ACOES_ESTRUTURANTES = [
     'Sem ação estruturante',
@@ -42,6 +48,81 @@ ACOES_ESTRUTURANTES = [
     'Outras ações estruturantes'
 ]
 
+class CacheLRU:
+    """
+    Cache LRU thread-safe, compartilhado entre sessões quando criado via
+    `st.cache_resource`. Limitado por número de itens e, opcionalmente, pelo
+    total de bytes armazenados. Mantém contadores de acertos e falhas.
+    """
+
+    def __init__(self, max_itens=128, max_bytes=None):
+        self.max_itens = max(int(max_itens), 1)
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def _tamanho(valor):
+        try:
+            return len(valor) if isinstance(valor, (bytes, bytearray, memoryview)) else 0
+        except Exception:
+            return 0
+
+    def obter(self, chave):
+        with self._lock:
+            if chave not in self._itens:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return self._itens[chave][0]
+
+    def guardar(self, chave, valor, tamanho=None):
+        tamanho = self._tamanho(valor) if tamanho is None else int(tamanho)
+        if self.max_bytes is not None and tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while self._itens and (
+                len(self._itens) > self.max_itens
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, tamanho_antigo) = self._itens.popitem(last=False)
+                self._bytes -= tamanho_antigo
+
+    def valores(self):
+        with self._lock:
+            return [valor for valor, _ in self._itens.values()]
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': (self.acertos / consultas) if consultas else 0.0,
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+            }
+
+
+def hash_conteudo(*partes):
+    """Hash estável (sha1) de strings/bytes, usado como chave de cache por conteúdo."""
+    h = hashlib.sha1()
+    for parte in partes:
+        if isinstance(parte, (bytes, bytearray, memoryview)):
+            h.update(bytes(parte))
+        else:
+            h.update(str(parte).encode('utf-8'))
+        h.update(b'\x1f')
+    return h.hexdigest()
+
 def normalizar_texto(texto):
     texto = '' if texto is None else str(texto)
     texto = texto.replace('\ufb01', 'fi').replace('\ufb02', 'fl').replace('', ' ')
@@ -68,20 +149,17 @@ def corrigir_texto_quebra(texto):
     return texto
 
 def encontrar_coluna(colunas, texto_alvo):
-    alvo = normalizar_texto(texto_alvo)
-    for coluna in colunas:
-        if normalizar_texto(coluna) == alvo:
-            return coluna
-    for coluna in colunas:
-        if alvo in normalizar_texto(coluna):
-            return coluna
-    return None
+    # Import tardio: catalogo_colunas depende deste módulo.
+    from catalogo_colunas import obter_catalogo
+
+    return obter_catalogo(colunas, normalizar_texto).encontrar(texto_alvo)
 
 def para_bool(serie):
     if serie is None:
         return pd.Series(dtype=bool)
-    if serie.dtype == bool:
-        return serie.fillna(False)
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        # Inclui as colunas "boolean" (com NA) tipadas em `_aplicar_esquema`.
+        return serie.fillna(False).astype(bool)
     if serie.dtype == object:
         return serie.fillna('').astype(str).str.strip().str.lower().isin(['sim', 'true', '1', 'yes'])
     return serie.fillna(0).astype(float).astype(int).astype(bool)
@@ -91,15 +169,39 @@ def classificar_rural_urbano(populacao):
         return 'Sem dado'
     return 'Urbano' if populacao > 50000 else 'Rural'
 
-@st.cache_data(show_spinner=False)
 def carregar_base():
-    # Load from current directory
-    caminho = os.path.join(os.path.dirname(__file__), 'base_final.csv')
-    return pd.read_csv(caminho, low_memory=False, encoding='utf-8-sig', on_bad_lines='warn')
+    # Snapshot Parquet quando atualizado; senão o CSV do diretório atual.
+    return carregar_base_colunar()
+
+@st.cache_resource(show_spinner=False)
+def _base_compartilhada(versao_cache):
+    # A versão muda a cada carga: identifica a base em chaves de cache.
+    return _derivar_colunas(carregar_base()), uuid.uuid4().hex
+
+
+def base_compartilhada(versao_cache='v2'):
+    """
+    A própria base tratada do processo, sem cópia. Só para leitura: serve de
+    origem para índices e catálogos; as páginas usam `preparar_base`.
+    """
+    return _base_compartilhada(versao_cache)[0]
+
+
+def versao_base(versao_cache='v2'):
+    """Identificador da carga atual da base (novo a cada recarga do cache)."""
+    return _base_compartilhada(versao_cache)[1]
+
 
-@st.cache_data(show_spinner=False)
 def preparar_base(versao_cache='v2'):
-    df = carregar_base().copy()
+    """
+    Base tratada, mantida uma única vez por processo. Cada chamada recebe uma
+    cópia rasa (sem duplicar dados); com copy-on-write (ligado em app.py),
+    alterações feitas por uma página não vazam para a base compartilhada nem para outras sessões.
+    """
+    return base_compartilhada(versao_cache).copy(deep=False)
+
+
+def _derivar_colunas(df):
     df.columns = [str(c) for c in df.columns]
 
     col_cidade_api = encontrar_coluna(df.columns, 'cidade_api')
@@ -166,54 +268,145 @@ def preparar_base(versao_cache='v2'):
         df['faixa_populacional'] = df['populacao'].apply(calcular_faixa)
 
     df['classificacao_rural_urbana'] = df['populacao'].apply(classificar_rural_urbano)
+    return _aplicar_esquema(df)
+
+
+# Mesmos valores que `para_bool` reconhece, mais as negativas explícitas.
+VOCABULARIO_BOOLEANO = {
+    'sim': True, 'true': True, '1': True, '1.0': True, 'yes': True,
+    'não': False, 'nao': False, 'false': False, '0': False, '0.0': False, 'no': False,
+}
+
+# Respostas fechadas com ordem fixa; valores observados fora da lista entram no fim.
+ESQUEMA_CATEGORICO = {
+    'faixa_receita': FAIXAS_RECEITA,
+    'faixa_populacional': ORDEM_FAIXA_POPULACIONAL,
+    'tipo_ponto': ['Ponto', 'Pontão'],
+    'classificacao_rural_urbana': ['Urbano', 'Rural', 'Sem dado'],
+}
+
+
+def agrupar_colunas_de_opcao(colunas):
+    """
+    Agrupa as colunas "Pergunta (Opção)" de múltipla escolha pela pergunta:
+    `{pergunta: [colunas]}`, apenas perguntas com ao menos duas opções.
+    """
+    grupos = {}
+    for coluna in colunas:
+        coluna = str(coluna)
+        if ' (' in coluna and coluna.rstrip().endswith(')'):
+            grupos.setdefault(coluna.split('(', 1)[0], []).append(coluna)
+    return {pergunta: grupo for pergunta, grupo in grupos.items() if len(grupo) >= 2}
+
+
+def _como_booleano(serie):
+    """Converte para o dtype "boolean" (NA preservado) ou retorna None se não for Sim/Não."""
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return None
+    valores = serie.dropna()
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        if not valores.isin([0, 1]).all():
+            return None
+        return serie.astype('boolean')
+    if serie.dtype != object:
+        return None
+    texto = valores.astype(str).str.strip().str.lower()
+    if not texto.isin(list(VOCABULARIO_BOOLEANO)).all():
+        return None
+    saida = pd.Series(pd.NA, index=serie.index, dtype='boolean')
+    saida.loc[valores.index] = texto.map(VOCABULARIO_BOOLEANO).astype(bool)
+    return saida
+
+
+def _aplicar_esquema(df):
+    """
+    Tipagem aplicada uma vez na preparação: opções de múltipla escolha Sim/Não
+    viram "boolean" e as respostas fechadas derivadas viram categóricas ordenadas.
+    Estado, região, UF e registro seguem como texto: páginas fazem `fillna('')`
+    e `groupby` nessas colunas, que com categóricas mudariam de comportamento.
+    """
+    convertidas = {}
+    colunas_opcao = [c for grupo in agrupar_colunas_de_opcao(df.columns).values() for c in grupo]
+    for coluna in colunas_opcao:
+        serie = _como_booleano(df[coluna])
+        if serie is not None:
+            convertidas[coluna] = serie
+    if convertidas:
+        # Atribuição em bloco: coluna a coluna fragmentaria o DataFrame largo.
+        df[list(convertidas)] = pd.DataFrame(convertidas, index=df.index)
+
+    for coluna, ordem in ESQUEMA_CATEGORICO.items():
+        if coluna not in df.columns:
+            continue
+        presentes = list(pd.unique(df[coluna].dropna()))
+        # Só categorias observadas: `value_counts`/`groupby` não criam linhas zeradas.
+        categorias = [v for v in ordem if v in presentes] + [v for v in presentes if v not in ordem]
+        df[coluna] = pd.Categorical(df[coluna], categories=categorias)
     return df
 
-def aplicar_filtros(df, filtros):
-    filtrado = df.copy()
+
+def sem_categorias_vazias(df):
+    """
+    Recorte da base sem as categorias que não aparecem nele, para que
+    `value_counts` e `groupby` das páginas não tragam barras/legendas zeradas.
+    """
+    colunas = [c for c in ESQUEMA_CATEGORICO if c in df.columns and isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if not colunas:
+        return df
+    return df.assign(**{c: df[c].cat.remove_unused_categories() for c in colunas})
+
+
+def mascara_filtros(df, filtros):
+    """Máscara booleana (numpy) das linhas de `df` que atendem a todos os filtros."""
+    mascara = np.ones(len(df), dtype=bool)
+
+    def _isin(coluna, chave):
+        return df[coluna].isin(filtros[chave]).to_numpy()
+
     if filtros.get('estado'):
-        filtrado = filtrado[filtrado['estado'].isin(filtros['estado'])]
-    if filtros.get('municipio'): # New filter
-        filtrado = filtrado[filtrado['cidade'].isin(filtros['municipio'])]
+        mascara &= _isin('estado', 'estado')
+    if filtros.get('municipio'):
+        mascara &= _isin('cidade', 'municipio')
     if filtros.get('regiao'):
-        filtrado = filtrado[filtrado['regiao'].isin(filtros['regiao'])]
+        mascara &= _isin('regiao', 'regiao')
     if filtros.get('faixa_populacional'):
-        filtrado = filtrado[filtrado['faixa_populacional'].isin(filtros['faixa_populacional'])]
+        mascara &= _isin('faixa_populacional', 'faixa_populacional')
     # Removed classificacao_rural_urbana filter as requested
-    
+
     if filtros.get('tipo_ponto'):
-        filtrado = filtrado[filtrado['tipo_ponto'].isin(filtros['tipo_ponto'])]
+        mascara &= _isin('tipo_ponto', 'tipo_ponto')
     if filtros.get('registro'):
-        filtrado = filtrado[filtrado['registro'].isin(filtros['registro'])]
+        mascara &= _isin('registro', 'registro')
     if filtros.get('faixa_receita'):
-        filtrado = filtrado[filtrado['faixa_receita'].isin(filtros['faixa_receita'])]
+        mascara &= _isin('faixa_receita', 'faixa_receita')
     if filtros.get('linguagem_artistica'):
         selecionadas = set(filtros['linguagem_artistica'])
-        filtrado = filtrado[filtrado['linguagens_lista'].apply(lambda itens: any(i in selecionadas for i in itens))]
+        mascara &= df['linguagens_lista'].map(lambda itens: any(i in selecionadas for i in itens)).to_numpy(dtype=bool)
 
     if filtros.get('acoes_estruturantes'):
-        colunas_acao = [c for c in ACOES_ESTRUTURANTES if c in filtrado.columns]
+        selecionadas = filtros['acoes_estruturantes']
+        colunas_acao = [c for c in ACOES_ESTRUTURANTES if c in df.columns and c in selecionadas]
         if colunas_acao:
-            selecionadas = filtros['acoes_estruturantes']
-            mascara = False
+            mascara_acao = np.zeros(len(df), dtype=bool)
             for coluna in colunas_acao:
-                if coluna in selecionadas:
-                    mascara = mascara | para_bool(filtrado[coluna])
-            filtrado = filtrado[mascara]
+                mascara_acao |= para_bool(df[coluna]).to_numpy(dtype=bool)
+            mascara &= mascara_acao
 
     acessos_recursos_or = filtros.get('acessos_recursos_or', [])
     if acessos_recursos_or:
-        colunas_bool_validas = [col for col in acessos_recursos_or if col in filtrado.columns]
+        colunas_bool_validas = [col for col in acessos_recursos_or if col in df.columns]
         if colunas_bool_validas:
-            mascara_or = pd.Series(False, index=filtrado.index)
+            mascara_or = np.zeros(len(df), dtype=bool)
             for coluna in colunas_bool_validas:
-                mascara_or = mascara_or | para_bool(filtrado[coluna])
-            filtrado = filtrado[mascara_or]
+                mascara_or |= para_bool(df[coluna]).to_numpy(dtype=bool)
+            mascara &= mascara_or
 
     for chave, coluna in filtros.get('filtros_booleanos', {}).items():
-        if coluna in filtrado.columns and filtros.get(chave) in ['Sim', 'Não']:
+        if coluna in df.columns and filtros.get(chave) in ['Sim', 'Não']:
             valor = filtros[chave] == 'Sim'
-            filtrado = filtrado[para_bool(filtrado[coluna]) == valor]
-    return filtrado
+            mascara &= para_bool(df[coluna]).to_numpy(dtype=bool) == valor
+    return mascara
+
 
 @st.cache_data(show_spinner=False)
 def carregar_geojson_estados():
@@ -221,3 +414,51 @@ def carregar_geojson_estados():
     with open(caminho, 'r', encoding='utf-8') as arquivo:
         return json.load(arquivo)
 
+
+
+CHAVE_BASE_FILTRADA = '_base_filtrada_rerun'
+
+
+@st.cache_resource(show_spinner=False)
+def _memo_filtros():
+    """Posições de linhas das combinações de filtros mais usadas, entre sessões."""
+    return CacheLRU(max_itens=256, max_bytes=64 * 1024 * 1024)
+
+
+def chave_filtros(filtros):
+    return hash_conteudo(json.dumps(filtros or {}, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def obter_base_filtrada(filtros=None):
+    """
+    Base com os filtros globais aplicados, calculada uma vez por combinação de
+    filtros e reaproveitada pelo painel de filtros e pela página no mesmo rerun.
+    Sem `filtros`, usa `st.session_state['filtros_globais']`.
+    """
+    from indice_filtros import obter_indice_filtros
+
+    if filtros is None:
+        filtros = st.session_state.get('filtros_globais') or {}
+    base = preparar_base()
+    chave = (chave_filtros(filtros), versao_base())
+
+    em_sessao = st.session_state.get(CHAVE_BASE_FILTRADA)
+    if em_sessao is not None and em_sessao[0] == chave:
+        return em_sessao[1].copy(deep=False)
+
+    memo = _memo_filtros()
+    linhas = memo.obter(chave)
+    if linhas is None:
+        # O índice só responde pela mesma carga da base; se os caches
+        # divergirem, calcula direto.
+        indice = obter_indice_filtros()
+        origem = base_compartilhada()
+        if indice.cobre(origem):
+            linhas = indice.linhas(filtros)
+        else:
+            linhas = np.flatnonzero(mascara_filtros(origem, filtros))
+        memo.guardar(chave, linhas, tamanho=linhas.nbytes)
+
+    filtrado = base if len(linhas) == len(base) else sem_categorias_vazias(base.iloc[linhas])
+    st.session_state[CHAVE_BASE_FILTRADA] = (chave, filtrado)
+    return filtrado.copy(deep=False)